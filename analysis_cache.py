@@ -0,0 +1,116 @@
+# analysis_cache.py - on-disk cache of product/question detections per message
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import config
+
+
+def normalize_text(text):
+    """Detection is case-insensitive apart from the model, so key on lowered text"""
+    return str(text).strip().lower()
+
+
+def cache_key(text, post_product, model_id, rules_version):
+    raw = "\x1f".join([normalize_text(text), str(post_product).strip(), model_id, rules_version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """SQLite store of detections keyed by message text, post product, model and rules.
+
+    Entries are evicted least-recently-used once the table grows past
+    max_entries, so the file stays bounded however many exports go through it.
+    """
+
+    def __init__(self, path=None, max_entries=None):
+        self.path = path or config.ANALYSIS_CACHE_DB
+        self.max_entries = max_entries or config.ANALYSIS_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS detections ("
+            " key TEXT PRIMARY KEY, products TEXT NOT NULL, questions TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON detections (last_used)")
+        self._conn.commit()
+
+    def get_many(self, keys):
+        """Return {key: (products, questions)} for the keys that are cached"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, products, questions FROM detections WHERE key IN ({marks})", chunk
+                ).fetchall()
+                for key, products, questions in rows:
+                    found[key] = (json.loads(products), json.loads(questions))
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE detections SET last_used = ? WHERE key = ?", [(now, k) for k in found]
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries):
+        """Store (key, products, questions) tuples"""
+        now = time.time()
+        rows = [
+            (key, json.dumps(products, ensure_ascii=False), json.dumps(questions, ensure_ascii=False), now)
+            for key, products, questions in entries
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO detections VALUES (?, ?, ?, ?)", rows)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM detections").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # Trim to 90% so eviction doesn't run on every single insert
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM detections WHERE key IN ("
+            " SELECT key FROM detections ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM detections")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM detections").fetchone()[0]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache, or None when config.ANALYSIS_CACHE_ENABLED is off"""
+    global _cache
+    if not config.ANALYSIS_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            config.ANALYSIS_CACHE_DB.parent.mkdir(parents=True, exist_ok=True)
+            _cache = AnalysisCache()
+        return _cache
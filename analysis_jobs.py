@@ -0,0 +1,136 @@
+# analysis_jobs.py - background analysis runs for the Streamlit app
+import threading
+import time
+
+import analysis_pipeline
+import config
+import instrumentation
+import results_table
+from logging_config import get_logger
+
+logger = get_logger('analysis_jobs')
+
+
+class AnalysisJob:
+    """Analyze grouped messages on a worker thread, one chunk at a time.
+
+    `groups` is the output of analysis_pipeline.group_messages and
+    `history_counts` the prior-message count for each group. Every finished
+    chunk is appended to the partial results straight away, so pages can show
+    (and act on) hot leads while the rest is still running. cancel() stops
+    after the current chunk; resume() carries on from the next one.
+
+    The job never touches st.session_state: the app polls results(),
+    progress and take_processed_rows() from the script thread.
+    """
+
+    def __init__(self, product_detector, question_analyzer, groups, history_counts, chunk_size=None, digest=None):
+        self.product_detector = product_detector
+        self.question_analyzer = question_analyzer
+        self.groups = groups.reset_index(drop=True)
+        self.history_counts = list(history_counts)
+        self.chunk_size = chunk_size or config.APP_JOB_CHUNK_SIZE
+        self.digest = digest  # which upload this job belongs to
+        self.status = 'pending'  # pending -> running -> done / cancelled / failed
+        self.error = None
+        self.timings = None
+        self.position = 0  # groups handled so far (analysed or skipped as blank)
+        self._frames = []
+        self._results = None
+        self._processed_rows = []
+        self._taken = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def total(self):
+        return len(self.groups)
+
+    @property
+    def progress(self):
+        return self.position / self.total if self.total else 1.0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def start(self):
+        """Start (or resume) the worker thread; no-op while it is already running"""
+        if self.running or self.status == 'done':
+            return
+        if self.position == 0:
+            instrumentation.get_metrics().reset()
+        self._stop.clear()
+        self.status = 'running'
+        self._thread = threading.Thread(target=self._run, name='analysis-job', daemon=True)
+        self._thread.start()
+
+    resume = start
+
+    def cancel(self):
+        """Stop after the chunk in progress; results so far are kept"""
+        self._stop.set()
+
+    def results(self):
+        """Typed results of every finished chunk (see results_table)"""
+        with self._lock:
+            if self._results is None:
+                self._results = results_table.concat(self._frames)
+                self._frames = [self._results] if len(self._results) else []
+            return self._results
+
+    def take_processed_rows(self):
+        """Original row labels analysed since the last call (to mark them processed once)"""
+        with self._lock:
+            rows = self._processed_rows[self._taken:]
+            self._taken = len(self._processed_rows)
+            return rows
+
+    def _run(self):
+        try:
+            while self.position < self.total and not self._stop.is_set():
+                self._analyze_chunk(self.position, min(self.position + self.chunk_size, self.total))
+            if self.position < self.total:
+                self.status = 'cancelled'
+                logger.info("Analysis job cancelled", extra={'fields': {'done': self.position, 'total': self.total}})
+                return
+            self.timings = instrumentation.get_metrics().write_summary('app', {'messages': len(self.results())})
+            self.status = 'done'
+        except Exception as e:
+            self.error = e
+            self.status = 'failed'
+            logger.exception("Analysis job failed")
+
+    def _analyze_chunk(self, start, stop):
+        chunk = self.groups.iloc[start:stop]
+        texts = chunk['message'].str.strip()
+        keep = (texts != '').to_numpy()
+        batch = chunk[keep]
+        history_counts = [count for count, ok in zip(self.history_counts[start:stop], keep) if ok]
+
+        frame = None
+        if len(batch):
+            usernames = batch['username'].str.strip().tolist()
+            batch_texts = texts[keep].tolist()
+            started = time.perf_counter()
+            analyses = analysis_pipeline.analyze_batch(
+                self.product_detector, self.question_analyzer, batch_texts,
+                batch['post_product'].tolist(), history_counts
+            )
+            frame = results_table.build(batch.assign(username=usernames, message=batch_texts), analyses)
+            logger.debug("Analysed chunk", extra={'fields': {
+                'start': start, 'size': len(batch), 'seconds': round(time.perf_counter() - started, 3),
+            }})
+
+        with self._lock:
+            if frame is not None:
+                self._frames.append(frame)
+                self._results = None
+            # Blank groups are skipped but still marked, as before
+            self._processed_rows.extend(index for rows in chunk['rows'] for index in rows)
+            self.position = stop
@@ -0,0 +1,154 @@
+# analysis_pipeline.py - detection + scoring for a batch of messages
+import pandas as pd
+
+import analysis_cache
+import config
+import instrumentation
+import intent_scoring
+import model_registry
+
+
+GROUP_COLUMNS = ['username', 'message', 'post_product', 'date', 'rows']
+
+
+def group_messages(df):
+    """Combine each user's messages per calendar day into one row.
+
+    Returns a DataFrame (sorted by username, day) with the non-blank
+    messages joined in time order, the first non-empty post_product, the
+    earliest date and `rows`, the index labels of the original rows in
+    each group.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=GROUP_COLUMNS)
+
+    rows = df.sort_values('date', kind='stable')
+    dates = pd.to_datetime(rows['date'], errors='coerce')
+    if 'post_product' in rows.columns:
+        post_products = rows['post_product'].map(lambda p: '' if pd.isna(p) else str(p).strip()).replace('', None)
+    else:
+        post_products = pd.Series(None, index=rows.index, dtype=object)
+
+    work = pd.DataFrame({
+        'username': rows['username'],
+        'day': dates.dt.date,
+        'message': [None if pd.isna(m) or not str(m).strip() else str(m) for m in rows['message']],
+        'post_product': post_products,
+        'date': dates,
+        'row': rows.index,
+    })
+    keys = ['username', 'day']
+    grouped = work.groupby(keys, sort=True, dropna=False).agg(
+        post_product=('post_product', 'first'),
+        date=('date', 'min'),
+        rows=('row', list),
+    )
+    # Blank messages still belong to their group (so they get marked) but add no text
+    texts = work.dropna(subset=['message']).groupby(keys, dropna=False)['message'].agg(' \n'.join)
+    grouped['message'] = texts.reindex(grouped.index).fillna('')
+    grouped = grouped.reset_index().drop(columns='day')
+    grouped['username'] = [str(u) for u in grouped['username']]
+    grouped['post_product'] = grouped['post_product'].fillna('')
+    return grouped[GROUP_COLUMNS]
+
+
+def analyze_batch(product_detector, question_analyzer, texts, post_products=None, history_counts=None, pool=None):
+    """Analyze many messages at once; returns one DataFrame row per text.
+
+    Products and questions are detected with the batched AI calls, keyword
+    signals come from QuestionAnalyzer.scan_signals, and every score is
+    computed in one vectorized intent_scoring.score_batch call. With a
+    parallel_analysis.AnalysisPool, detection runs in its worker processes.
+    """
+    texts = [str(t) for t in texts]
+    if post_products is None:
+        post_products = [''] * len(texts)
+    if history_counts is None:
+        history_counts = [0] * len(texts)
+    history_counts = list(history_counts)
+
+    instrumentation.count('messages', len(texts))
+    with instrumentation.timer('pipeline.detect'):
+        if pool is not None:
+            products, questions, signals = pool.detect(texts, list(post_products))
+        else:
+            products, questions, signals = detect_signals(product_detector, question_analyzer, texts, list(post_products))
+
+    ready_to_buy = [s['ready_to_buy'] for s in signals]
+    timeframes = [s['timeframe'] for s in signals]
+    urgency_modifiers = [s['urgency_modifier'] for s in signals]
+
+    with instrumentation.timer('pipeline.scoring'):
+        scored = intent_scoring.score_batch(
+            urgent_questions=[sum(1 for q in qs if q['urgency'] == 'high') for qs in questions],
+            ready_to_buy=ready_to_buy,
+            timeframe=timeframes,
+            history_count=history_counts,
+            urgency_modifier=urgency_modifiers,
+        )
+
+    result = pd.DataFrame({
+        'product': [product_detector.get_primary_product(p) for p in products],
+        'questions': [question_analyzer.format_questions_list(q) for q in questions],
+        'ready_to_buy': ready_to_buy,
+        'timeframe': timeframes,
+        'urgency_modifier': urgency_modifiers,
+        'history_count': history_counts,
+    })
+    return pd.concat([result, scored], axis=1)
+
+
+def detect_signals(product_detector, question_analyzer, texts, post_products):
+    """Everything analyze_batch needs before scoring: (products, questions, keyword signals)"""
+    products, questions = detect_batch(product_detector, question_analyzer, texts, post_products)
+    with instrumentation.timer('pipeline.keyword_signals'):
+        signals = [question_analyzer.scan_signals(t) for t in texts]
+    return products, questions, signals
+
+
+def detect_batch(product_detector, question_analyzer, texts, post_products):
+    """Product + question detections per text, served from the analysis cache when possible"""
+    cache = analysis_cache.get_cache()
+    if cache is None:
+        with instrumentation.timer('pipeline.products'):
+            products = product_detector.detect_products_batch(texts, post_products)
+        with instrumentation.timer('pipeline.questions'):
+            questions = question_analyzer.analyze_questions_batch(texts)
+        return products, questions
+
+    # Results with and without the AI model differ, so key on what will actually run
+    ai_model = model_registry.get_model()
+    model_id = ai_model.cache_id
+    rules_version = f"{product_detector.rules_version}.{question_analyzer.rules_version}"
+    if config.CASCADE_MODE:
+        rules_version += ".cascade"
+    keys = [
+        analysis_cache.cache_key(text, post_product, model_id, rules_version)
+        for text, post_product in zip(texts, post_products)
+    ]
+    with instrumentation.timer('cache.lookup'):
+        found = cache.get_many(keys)
+    instrumentation.count('cache.hits', sum(1 for key in keys if key in found))
+    instrumentation.count('cache.misses', sum(1 for key in keys if key not in found))
+
+    # Detect each distinct missing message once
+    missing = {}
+    for i, key in enumerate(keys):
+        if key not in found and key not in missing:
+            missing[key] = i
+    if missing:
+        todo = list(missing.values())
+        with instrumentation.timer('pipeline.products'):
+            new_products = product_detector.detect_products_batch(
+                [texts[i] for i in todo], [post_products[i] for i in todo]
+            )
+        with instrumentation.timer('pipeline.questions'):
+            new_questions = question_analyzer.analyze_questions_batch([texts[i] for i in todo])
+        for key, prods, qs in zip(missing, new_products, new_questions):
+            found[key] = (prods, qs)
+        # Don't file results under the old key if the model became ready mid-batch
+        if model_id == ai_model.cache_id:
+            with instrumentation.timer('cache.store'):
+                cache.put_many((key, *found[key]) for key in missing)
+
+    return [found[key][0] for key in keys], [found[key][1] for key in keys]
@@ -5,9 +5,19 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, date
+import hashlib
+import io
 import os
 from product_detector import ProductDetector
 from question_analyzer import QuestionAnalyzer
+import analysis_pipeline
+from analysis_jobs import AnalysisJob
+import ingest
+import instrumentation
+import model_registry
+import results_table
+from conversation_history import HistoryCounter
+from logging_config import setup_logging
 import styles
 import matplotlib.pyplot as plt
 
@@ -31,14 +41,98 @@ if 'results' not in st.session_state:
 if 'df' not in st.session_state:
     st.session_state.df = None
 
-# Load analyzers (cached for performance)
+# Load analyzers (cached for performance). The shared AI model loads in the
+# background, so the rule-based path is usable immediately.
 @st.cache_resource
 def load_analyzers():
     """Load analyzers once and cache them"""
+    setup_logging()
     return ProductDetector(), QuestionAnalyzer()
 
 product_detector, question_analyzer = load_analyzers()
 
+# Parsed uploads are cached by content hash, so reruns and page switches don't re-read the file
+@st.cache_data(max_entries=4, show_spinner="Reading file...")
+def parse_upload(digest, name, _data):
+    """Parse and normalize an uploaded export (dates parsed, 'processed' column added)"""
+    source = io.BytesIO(_data)
+    source.name = name
+    df = ingest.read_frame(source)
+    added_processed = 'processed' not in df.columns
+    if added_processed:
+        df['processed'] = 'no'
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    return df, added_processed
+
+def load_upload(uploaded_file):
+    """Normalized DataFrame for the current upload, shared by every page"""
+    data = uploaded_file.getvalue()
+    digest = hashlib.sha256(data).hexdigest()
+    if st.session_state.df is None or st.session_state.get('df_digest') != digest:
+        df, added_processed = parse_upload(digest, uploaded_file.name, data)
+        st.session_state.df = df
+        st.session_state.df_digest = digest
+        st.session_state.df_added_processed = added_processed
+    return st.session_state.df
+
+# Short badges for the segment labels in result tables
+SEGMENT_BADGES = {
+    'Hot Lead': '🔥 Hot Lead',
+    'Warm Lead': '✨ Warm Lead',
+    'VIP': '👑 VIP',
+    'Engaged Buyer': '🎯 Engaged',
+    'New Prospect': '📋 New',
+    'Browsing': '💼 Returning'
+}
+
+def shorten(messages, limit=100):
+    """Messages cut to `limit` characters for display"""
+    return messages.where(messages.str.len() <= limit, messages.str.slice(0, limit) + "...")
+
+def sync_job():
+    """Bring the session up to date with the background analysis job, if any.
+
+    Marks the rows it has finished as processed and exposes its (partial)
+    results to every page. A job for a previous upload is cancelled.
+    """
+    job = st.session_state.get('job')
+    if job is None:
+        return None
+    if job.digest != st.session_state.get('df_digest'):
+        job.cancel()
+        st.session_state.job = None
+        return None
+    rows = job.take_processed_rows()
+    if rows and st.session_state.df is not None:
+        st.session_state.df.loc[rows, 'processed'] = 'yes'
+    if job.position:
+        st.session_state.results = job.results()
+    st.session_state.analyzed = job.status == 'done'
+    if job.timings is not None:
+        st.session_state.timings = job.timings
+    return job
+
+@st.fragment(run_every=1)
+def show_job_progress(job):
+    """Live progress of a running job; reruns the whole page once it stops"""
+    if not job.running:
+        st.rerun()
+    st.progress(job.progress, text=f"Analyzing... {job.position}/{job.total} conversations")
+    stats = results_table.intent_stats(job.results())
+    st.caption(f"So far: 🔥 {stats['very_high']} very high · 🎯 {stats['high']} high intent "
+               "(see 'Priority Alerts' while the rest runs)")
+    if st.button("⏹️ Stop", key='stop-job'):
+        job.cancel()
+
+def show_partial_notice(job):
+    """Tell result pages they are looking at part of a run"""
+    if job is None or job.status == 'done':
+        return
+    state = "running" if job.running else job.status
+    st.info(f"⏳ Showing results for {job.position}/{job.total} conversations (analysis {state})")
+    if job.running:
+        st.button("🔄 Refresh")  # any click reruns the page with the latest results
+
 # Sidebar
 with st.sidebar:
     # Show local logo if available, otherwise fallback to a compact Instagram icon
@@ -53,7 +147,7 @@ with st.sidebar:
     # File uploader
     uploaded_file = st.file_uploader(
         "📂 Upload Excel File",
-        type=['xlsx'],
+        type=['xlsx', 'csv', 'jsonl'],
         help="Upload your instagram_conversations.xlsx file"
     )
     
@@ -68,6 +162,25 @@ with st.sidebar:
     
     st.markdown("---")
     
+    # AI model readiness
+    ai_model = model_registry.get_model()
+    if ai_model.status == "ready":
+        st.success("🤖 AI model ready")
+    elif ai_model.status == "failed":
+        st.warning("⚠️ AI model unavailable - rule-based analysis only")
+    elif ai_model.status == "disabled":
+        st.info("ℹ️ AI model disabled (AI_LOAD_MODE = \"off\") - rule-based analysis only")
+    else:
+        st.info(f"⏳ AI model {ai_model.status} - rule-based analysis until ready")
+        if st.button("🔥 Warm up AI model", use_container_width=True):
+            with st.spinner("Loading AI model..."):
+                model_registry.warm_up()
+            st.rerun()
+    if ai_model.fast_tier_ready():
+        st.caption(f"⚡ Fast tier v{ai_model.fast_tier.version} answers confident messages without the AI model")
+    
+    st.markdown("---")
+    
     # Navigation
     page = st.radio(
         "📍 Navigate",
@@ -138,8 +251,7 @@ if page == "🏠 Home":
         st.success(f"✅ File loaded: {uploaded_file.name}")
         
         try:
-            df = pd.read_excel(uploaded_file)
-            st.session_state.df = df
+            df = load_upload(uploaded_file)
             
             # Overview metrics
             col1, col2, col3, col4 = st.columns(4)
@@ -159,7 +271,6 @@ if page == "🏠 Home":
             
             with col4:
                 if 'date' in df.columns:
-                    df['date'] = pd.to_datetime(df['date'], errors='coerce')
                     days = (df['date'].max() - df['date'].min()).days
                     st.metric("📅 Days Span", days)
                 else:
@@ -187,51 +298,18 @@ elif page == "📊 Daily Analysis":
         st.warning("⚠️ Please upload an Excel file first!")
     else:
         try:
-            # Load data
-            df = pd.read_excel(uploaded_file)
-            st.session_state.df = df
-
-            # Add processed column if missing
-            if 'processed' not in df.columns:
-                df['processed'] = 'no'
+            # Load data (parsed once per upload; dates converted, processed column added)
+            df = load_upload(uploaded_file)
+            job = sync_job()
+            if st.session_state.df_added_processed:
                 st.info("ℹ️ Added 'processed' column to your data")
 
-            # Convert dates
-            df['date'] = pd.to_datetime(df['date'], errors='coerce')
-
             # Filter new messages (raw rows)
             raw_new_messages = df[df['processed'] == 'no'].copy()
 
-            # Group messages by username + date (treat messages from same user on same day as one)
-            if len(raw_new_messages) > 0:
-                raw_new_messages['date_only'] = raw_new_messages['date'].dt.date
-                raw_new_messages = raw_new_messages.sort_values('date')
-                grouped = raw_new_messages.groupby(['username', 'date_only'])
-
-                # Build combined message entries (list of dicts) and keep original indices to mark processed later
-                combined_messages = []
-                rows_to_mark = []
-                for (username, date_only), group in grouped:
-                    combined_text = " \n".join(group['message'].astype(str).tolist())
-                    # prefer any non-empty post_product from the group
-                    if 'post_product' in group.columns:
-                        pp = [str(x).strip() for x in group['post_product'].fillna('') if str(x).strip()]
-                        combined_product = pp[0] if len(pp) > 0 else ''
-                    else:
-                        combined_product = ''
-
-                    combined_messages.append({
-                        'username': str(username),
-                        'message': combined_text,
-                        'post_product': combined_product,
-                        'date': group['date'].min(),
-                        'original_indices': group.index.tolist()
-                    })
-
-                    rows_to_mark.extend(group.index.tolist())
-            else:
-                combined_messages = []
-                rows_to_mark = []
+            # Group messages by username + date (treat messages from same user on same day as one);
+            # `rows` keeps the original indices to mark processed later
+            combined_messages = analysis_pipeline.group_messages(raw_new_messages)
             
             # Display stats
             col1, col2, col3 = st.columns(3)
@@ -247,22 +325,16 @@ elif page == "📊 Daily Analysis":
             
             st.markdown("---")
             
-            if len(raw_new_messages) == 0:
+            if job is None and len(raw_new_messages) == 0:
                 st.success("✅ All messages are already processed!")
                 st.info("💡 Add new messages with processed='no' and upload the file again")
-            else:
+            elif job is None:
                 st.info(f"🆕 Found {len(combined_messages)} new messages ready to analyze")
                 
                 # Show preview of new (grouped) messages
                 with st.expander("👁️ Preview New Messages (grouped by user & day)"):
-                    preview_rows = []
-                    for entry in combined_messages[:10]:
-                        preview_rows.append({
-                            'username': entry['username'],
-                            'message': entry['message'][:300],
-                            'date': entry['date']
-                        })
-                    preview_df = pd.DataFrame(preview_rows)
+                    preview_df = combined_messages.head(10)[['username', 'message', 'date']].copy()
+                    preview_df['message'] = preview_df['message'].str.slice(0, 300)
                     st.dataframe(preview_df, use_container_width=True)
                 
                 st.markdown("---")
@@ -273,140 +345,64 @@ elif page == "📊 Daily Analysis":
                     analyze_button = st.button("🚀 Analyze New Messages", type="primary", use_container_width=True)
                 
                 if analyze_button:
-                    # Progress tracking
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-
-                    results = []
-
-                    # Process each grouped (combined) message
-                    for idx, entry in enumerate(combined_messages):
-                        # Update progress
-                        progress = (idx + 1) / max(1, len(combined_messages))
-                        progress_bar.progress(progress)
-                        status_text.text(f"Analyzing {idx + 1}/{len(combined_messages)}: @{entry['username']}")
-
-                        # Get message data
-                        username = str(entry['username']).strip()
-                        message = str(entry['message']).strip()
-                        post_product = str(entry.get('post_product', '')).strip()
-
-                        if not message or message == 'nan':
-                            continue
-
-                        # Get conversation history (only previously processed rows)
-                        history_count = len(df[(df['username'] == username) & (df['processed'] == 'yes')])
-
-                        # Detect products
-                        products = product_detector.detect_products(message, post_product)
-                        primary_product = product_detector.get_primary_product(products)
-
-                        # Analyze questions
-                        questions = question_analyzer.analyze_questions(message)
-                        all_questions = question_analyzer.format_questions_list(questions)
-
-                        # Sentiment analysis
-
-
-                        # Urgency modifiers
-                        urgency_modifier = question_analyzer.detect_urgency_modifiers(message)
-
-                        # Intent signals
-                        ready_to_buy = question_analyzer.is_ready_to_buy(message)
-                        timeframe = question_analyzer.detect_timeframe(message)
-                        
-                        # Calculate intent score with sentiment boost
-                        score = 0.3
-                        urgent_q = sum(1 for q in questions if q['urgency'] == 'high')
-                        score += urgent_q * 0.15
-                        if ready_to_buy:
-                            score += 0.3
-                        if timeframe in ['Today', 'Tomorrow']:
-                            score += 0.25
-                        elif timeframe != 'Not specified':
-                            score += 0.10
-                        if history_count > 0:
-                            score += min(history_count * 0.05, 0.15)
-                        
-
-                        # Boost for urgency modifiers
-                        score += min(urgency_modifier * 0.02, 0.2)
-                        
-                        score = min(score, 1.0)
-                        
-                        # Customer segmentation (after score is calculated)
-                        customer_segment = question_analyzer.segment_customer(message, history_count, score)
-                        
-                        # Intent level
-                        if score > 0.8:
-                            intent = "Very High"
-                        elif score > 0.6:
-                            intent = "High"
-                        elif score > 0.4:
-                            intent = "Medium"
-                        else:
-                            intent = "Low"
-                        
-                        # Conversation stage
-                        if history_count == 0:
-                            stage = "Initial Contact"
-                        elif history_count <= 2:
-                            stage = "Follow-up"
-                        else:
-                            stage = "Active Discussion"
-                        
-                        # Store result
-                        results.append({
-                            'username': username,
-                            'message': message[:100] + "..." if len(message) > 100 else message,
-                            'product': primary_product,
-                            'questions': all_questions,
-                            'intent': intent,
-                            'intent_score': f"{score:.0%}",
-                            'timeframe': timeframe,
-                            'ready_to_buy': 'YES' if ready_to_buy else 'NO',
-                            'stage': stage,
-                            'message_number': history_count + 1,
-                            'customer_segment': customer_segment,
-                        })
-                    
-                    # Clear progress indicators
-                    progress_bar.empty()
-                    status_text.empty()
-
-                    # Store results in session
-                    st.session_state.results = results
-                    st.session_state.analyzed = True
-
-                    # Mark original rows as processed
+                    # Conversation history (only previously processed rows), computed once for the whole run
+                    history = HistoryCounter.from_frame(df)
+                    history_counts = [history.get(str(username).strip()) for username in combined_messages['username']]
+
+                    # Analysis runs on a background thread; reruns and page switches don't stop it
+                    job = AnalysisJob(product_detector, question_analyzer, combined_messages, history_counts,
+                                      digest=st.session_state.df_digest)
+                    job.start()
+                    st.session_state.job = job
+                    st.rerun()
+            else:
+                if job.running:
+                    show_job_progress(job)
+                elif job.status == 'cancelled':
+                    st.warning(f"⏸️ Analysis stopped after {job.position}/{job.total} conversations. "
+                               "Results so far are on the other pages.")
+                    if st.button("▶️ Resume Analysis", type="primary"):
+                        job.resume()
+                        st.rerun()
+                elif job.status == 'failed':
+                    st.error(f"❌ Analysis failed after {job.position}/{job.total} conversations: {job.error}")
+                    if st.button("🔁 Retry"):
+                        job.resume()
+                        st.rerun()
+
+                if job.status == 'done':
+                    results = job.results()
+
+                    # Processed flags are set as each chunk finishes; offer the updated file
                     try:
-                        if len(rows_to_mark) > 0:
-                            df.loc[rows_to_mark, 'processed'] = 'yes'
-                            st.session_state.df = df
+                        from io import BytesIO
+                        buf = BytesIO()
+                        df.to_excel(buf, index=False)
+                        buf.seek(0)
+                        st.download_button(
+                            label="📥 Download Updated Excel",
+                            data=buf.getvalue(),
+                            file_name=f"instagram_conversations_updated_{date.today()}.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                            key='download-updated-excel',
+                            use_container_width=True
+                        )
                     except Exception:
-                        # if marking fails, ignore but warn
-                        st.warning('Could not update processed flags in-memory; you can update the Excel manually if needed.')
-                    else:
-                        # Provide updated Excel for download (in-memory) so user can save changes
-                        try:
-                            from io import BytesIO
-                            buf = BytesIO()
-                            df.to_excel(buf, index=False)
-                            buf.seek(0)
-                            st.download_button(
-                                label="📥 Download Updated Excel",
-                                data=buf.getvalue(),
-                                file_name=f"instagram_conversations_updated_{date.today()}.xlsx",
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                key='download-updated-excel',
-                                use_container_width=True
-                            )
-                        except Exception:
-                            pass
+                        pass
                     
                     # Success message
                     st.success(f"✅ Successfully analyzed {len(results)} messages!")
                     
+                    # Where the time went (also appended to logs/metrics.jsonl)
+                    timings = st.session_state.timings
+                    with st.expander(f"⏱️ Timing ({timings['wall_seconds']:.2f}s)"):
+                        st.dataframe(pd.DataFrame([
+                            {'stage': name, 'seconds': t['seconds'], 'calls': t['calls'], 'max_seconds': t['max_seconds']}
+                            for name, t in timings['timings'].items()
+                        ]), use_container_width=True)
+                        if timings['counters']:
+                            st.caption(" · ".join(f"{name}: {value}" for name, value in timings['counters'].items()))
+                    
                     st.markdown("---")
                     
                     # Display results
@@ -473,38 +469,20 @@ elif page == "📊 Daily Analysis":
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    results_df = pd.DataFrame(results)
+                    results_df = results_table.for_report(results)
                     
-                    # Add visual badges
-                    display_results = []
-                    for r in results:
-                        # Segment badge with styling
-                        segment_map = {
-                            'Hot Lead': '🔥 Hot Lead',
-                            'Warm Lead': '✨ Warm Lead',
-                            'VIP': '👑 VIP',
-                            'Engaged Buyer': '🎯 Engaged',
-                            'New Prospect': '📋 New',
-                            'Browsing': '💼 Returning'
-                        }
-                        segment_badge = segment_map.get(r['customer_segment'], r['customer_segment'])
-                        
-                        display_results.append({
-                            'Username': r['username'],
-                            'Message': r['message'],
-                            'Product': r['product'],
-                            'Questions': r['questions'],
-                            'Intent': r['intent'],
-                            'Score': r['intent_score'],
-                            'Timeframe': r['timeframe'],
-                            'Stage': r['stage'],
-                            'Timeframe': r['timeframe'],
-                            'Stage': r['stage'],
-                            'Segment': segment_badge,
-                            'Ready': r['ready_to_buy']
-                        })
-                    
-                    display_df = pd.DataFrame(display_results)
+                    display_df = pd.DataFrame({
+                        'Username': results['username'],
+                        'Message': shorten(results['message']),
+                        'Product': results['product'],
+                        'Questions': results['questions'],
+                        'Intent': results['intent'],
+                        'Score': results_df['intent_score'],
+                        'Timeframe': results['timeframe'],
+                        'Stage': results['stage'],
+                        'Segment': results['customer_segment'].astype(str).replace(SEGMENT_BADGES),
+                        'Ready': results_df['ready'],
+                    })
                     
                     # Color coding function
                     def highlight_intent(row):
@@ -537,28 +515,23 @@ elif page == "📊 Daily Analysis":
                     st.markdown("### 📈 Summary Statistics")
                     
                     col1, col2, col3, col4 = st.columns(4)
+                    stats = results_table.intent_stats(results)
+                    very_high, high = stats['very_high'], stats['high']
                     
                     with col1:
-                        very_high = len([r for r in results if r['intent'] == 'Very High'])
                         st.metric("🔥 Very High Intent", very_high)
                     with col2:
-                        high = len([r for r in results if r['intent'] == 'High'])
                         st.metric("🎯 High Intent", high)
                     with col3:
-                        medium = len([r for r in results if r['intent'] == 'Medium'])
-                        st.metric("⚠️ Medium Intent", medium)
+                        st.metric("⚠️ Medium Intent", stats['medium'])
                     with col4:
-                        low = len([r for r in results if r['intent'] == 'Low'])
-                        st.metric("ℹ️ Low Intent", low)
+                        st.metric("ℹ️ Low Intent", stats['low'])
                     
                     
                     with col2:
-                        segment_counts = {}
-                        for r in results:
-                            segment = r['customer_segment']
-                            segment_counts[segment] = segment_counts.get(segment, 0) + 1
+                        segment_counts = results_table.counts(results, 'customer_segment')
                         
-                        if segment_counts:
+                        if len(segment_counts):
                             import matplotlib.patches as mpatches
                             fig, ax = plt.subplots(figsize=(8, 5))
                             # Updated colors matching warm scheme
@@ -576,8 +549,8 @@ elif page == "📊 Daily Analysis":
                                 '💼 Returning': '#6b7280',
                                 'Browsing': '#6b7280'
                             }
-                            segments = list(segment_counts.keys())
-                            counts = list(segment_counts.values())
+                            segments = segment_counts.index.astype(str).tolist()
+                            counts = segment_counts.tolist()
                             colors = [segment_color_map.get(s, '#bdc3c7') for s in segments]
                             bars = ax.barh(segments, counts, color=colors)
                             ax.set_xlabel("Number of Customers", fontweight='bold')
@@ -591,7 +564,7 @@ elif page == "📊 Daily Analysis":
                     
                     # Hot Leads Indicator
                     st.markdown("---")
-                    hot_leads = len([r for r in results if r['customer_segment'] == 'Hot Lead'])
+                    hot_leads = int((results['customer_segment'] == '🔥 Hot Lead').sum())
                     
                     st.metric("🔥 Hot Leads", hot_leads, delta=f"{hot_leads} ready to buy")
                     
@@ -611,13 +584,15 @@ elif page == "📊 Daily Analysis":
 # ============================================
 elif page == "🚨 Priority Alerts":
     st.title("🚨 Priority Customer Alerts")
+    show_partial_notice(sync_job())
     
     if st.session_state.results is None:
         st.warning("⚠️ Please run Daily Analysis first to see priority alerts")
         st.info("💡 Go to 'Daily Analysis' page and click 'Analyze New Messages'")
     else:
         results = st.session_state.results
-        priority = [r for r in results if r['intent'] in ['Very High', 'High']]
+        # Very High first, then by score
+        priority = results_table.priority(results)
         
         if len(priority) == 0:
             st.success("✅ No high-priority customers at the moment")
@@ -625,11 +600,8 @@ elif page == "🚨 Priority Alerts":
         else:
             st.error(f"🚨 {len(priority)} HIGH PRIORITY CUSTOMERS - ACTION REQUIRED!")
             
-            # Sort by intent (Very High first)
-            priority.sort(key=lambda x: (x['intent'] == 'Very High', x['intent_score']), reverse=True)
-            
             # Download Priority List
-            priority_df = pd.DataFrame(priority)
+            priority_df = results_table.for_report(priority)
             priority_csv = priority_df.to_csv(index=False).encode('utf-8')
             st.download_button(
                 label="📥 Download Priority List as CSV",
@@ -642,10 +614,11 @@ elif page == "🚨 Priority Alerts":
             st.markdown("---")
             
             # Display each priority customer
-            for idx, p in enumerate(priority, 1):
+            for idx, (p, report) in enumerate(zip(priority.itertuples(index=False),
+                                                  priority_df.itertuples(index=False)), 1):
                 with st.container():
                     # Priority badge
-                    if p['intent'] == 'Very High':
+                    if p.intent == 'Very High':
                         st.markdown(f'<div class="priority-high">🔥 PRIORITY #{idx} - VERY HIGH URGENCY</div>', unsafe_allow_html=True)
                     else:
                         st.markdown(f'<div class="priority-medium">⚠️ PRIORITY #{idx} - HIGH URGENCY</div>', unsafe_allow_html=True)
@@ -654,31 +627,23 @@ elif page == "🚨 Priority Alerts":
                     col1, col2, col3 = st.columns([2, 1.5, 1.5])
                     
                     with col1:
-                        st.markdown(f"### 👤 @{p['username']}")
-                        st.write(f"**Message:** {p['message']}")
-                        st.write(f"**Conversation Stage:** {p['stage']} (Message #{p['message_number']})")
+                        st.markdown(f"### 👤 @{p.username}")
+                        st.write(f"**Message:** {p.message[:100] + '...' if len(p.message) > 100 else p.message}")
+                        st.write(f"**Conversation Stage:** {p.stage} (Message #{p.message_number})")
                     
                     with col2:
-                        st.metric("Intent Level", p['intent'], p['intent_score'])
-                        st.write(f"**Product Interest:** {p['product']}")
-                        st.write(f"**Questions:** {p['questions']}")
+                        st.metric("Intent Level", p.intent, report.intent_score)
+                        st.write(f"**Product Interest:** {p.product}")
+                        st.write(f"**Questions:** {p.questions}")
                     
 
-                        segment_map = {
-                            'Hot Lead': '🔥 Hot Lead',
-                            'Warm Lead': '✨ Warm Lead',
-                            'VIP': '👑 VIP',
-                            'Engaged Buyer': '🎯 Engaged',
-                            'New Prospect': '📋 New',
-                            'Browsing': '💼 Returning'
-                        }
-                        segment_display = segment_map.get(p['customer_segment'], p['customer_segment'])
+                        segment_display = SEGMENT_BADGES.get(p.customer_segment, p.customer_segment)
                         st.write(f"**Segment:** {segment_display}")
-                        st.write(f"**Timeframe:** {p['timeframe']}")
-                        st.write(f"**Ready to Buy:** {p['ready_to_buy']}")
+                        st.write(f"**Timeframe:** {p.timeframe}")
+                        st.write(f"**Ready to Buy:** {report.ready}")
                     
                     # Action recommendation based on segment
-                    if p['intent'] == 'Very High':
+                    if p.intent == 'Very High':
                         st.error("⚡ **URGENT ACTION:** Reply within 30 minutes! Customer is ready to buy NOW!")
                     else:
                         st.warning("⏰ **ACTION REQUIRED:** Reply within 2 hours to maintain interest")
@@ -690,6 +655,7 @@ elif page == "🚨 Priority Alerts":
 # ============================================
 elif page == "📈 Statistics":
     st.title("📈 Statistics & Insights")
+    show_partial_notice(sync_job())
     
     if st.session_state.results is None:
         st.warning("⚠️ Please run Daily Analysis first to see statistics")
@@ -723,7 +689,7 @@ elif page == "📈 Statistics":
         with col3:
             st.metric("👥 Unique Customers", df['username'].nunique() if df is not None else 0)
         with col4:
-            priority_count = len([r for r in results if r['intent'] in ['High', 'Very High']])
+            priority_count = int(results['intent'].isin(results_table.PRIORITY_INTENTS).sum())
             st.metric("🚨 Priority Customers", priority_count)
         
         st.markdown("---")
@@ -731,21 +697,19 @@ elif page == "📈 Statistics":
         # Intent distribution
         st.markdown("### 🎯 Purchase Intent Distribution")
         
-        intent_counts = {}
-        for r in results:
-            intent_counts[r['intent']] = intent_counts.get(r['intent'], 0) + 1
+        intent_counts = results_table.counts(results, 'intent')
         
-        if intent_counts:
+        if len(intent_counts):
             col1, col2 = st.columns(2)
             
             with col1:
                 # Bar chart
-                st.bar_chart(pd.Series(intent_counts))
+                st.bar_chart(intent_counts.rename(index=str))
             
             with col2:
                 # Metrics
                 st.write("**Intent Breakdown:**")
-                for intent, count in sorted(intent_counts.items(), key=lambda x: x[1], reverse=True):
+                for intent, count in intent_counts.items():
                     percentage = (count / len(results)) * 100
                     st.metric(intent, f"{count} ({percentage:.1f}%)")
         
@@ -757,16 +721,12 @@ elif page == "📈 Statistics":
         st.markdown("### 👥 Customer Segment Distribution")
         
         # Calculate segment counts
-        segment_counts = {}
-        for r in results:
-            segment = r['customer_segment']
-            segment_counts[segment] = segment_counts.get(segment, 0) + 1
-
+        segment_counts = results_table.counts(results, 'customer_segment')
         
         col1, col2 = st.columns(2)
         
         with col1:
-                if segment_counts:
+                if len(segment_counts):
                     import matplotlib.pyplot as plt
                     import matplotlib.patches as mpatches
                     fig, ax = plt.subplots(figsize=(8, 6))
@@ -784,8 +744,8 @@ elif page == "📈 Statistics":
                         '💼 Returning': '#6b7280',
                         'Browsing': '#6b7280'
                     }
-                    labels = list(segment_counts.keys())
-                    sizes = list(segment_counts.values())
+                    labels = segment_counts.index.astype(str).tolist()
+                    sizes = segment_counts.tolist()
                     colors = [segment_color_map.get(s, '#bdc3c7') for s in labels]
                     bars = ax.barh(labels, sizes, color=colors)
                     ax.set_xlabel("Number of Customers", fontweight='bold')
@@ -806,7 +766,7 @@ elif page == "📈 Statistics":
                 'New Prospect': '🆕 New Prospects',
                 'Browsing': '👀 Browsing'
             }
-            for segment, count in sorted(segment_counts.items(), key=lambda x: x[1], reverse=True):
+            for segment, count in segment_counts.items():
                 label = segment_labels.get(segment, segment)
                 percentage = (count / len(results)) * 100
                 st.metric(label, f"{count} ({percentage:.1f}%)")
@@ -816,25 +776,20 @@ elif page == "📈 Statistics":
         # Product demand
         st.markdown("### 📦 Product Demand Analysis")
         
-        products = {}
-        for r in results:
-            if r['product'] != 'Not specified':
-                products[r['product']] = products.get(r['product'], 0) + 1
+        products = results_table.product_demand(results)
         
-        if products:
+        if len(products):
             col1, col2 = st.columns(2)
             
             with col1:
                 st.markdown("**Top Requested Products:**")
                 # Bar chart
-                products_series = pd.Series(products).sort_values(ascending=False)
-                st.bar_chart(products_series)
+                st.bar_chart(products.rename(index=str))
             
             with col2:
                 st.markdown("**Product Request Details:**")
                 # Table
-                products_df = pd.DataFrame(list(products.items()), columns=['Product', 'Requests'])
-                products_df = products_df.sort_values('Requests', ascending=False)
+                products_df = pd.DataFrame({'Product': products.index.astype(str), 'Requests': products.to_numpy()})
                 products_df['Percentage'] = (products_df['Requests'] / products_df['Requests'].sum() * 100).round(1)
                 st.dataframe(products_df, use_container_width=True)
         else:
@@ -845,14 +800,10 @@ elif page == "📈 Statistics":
         # Question analysis
         st.markdown("### ❓ Common Customer Questions")
         
-        questions_dict = {}
-        for r in results:
-            for q in r['questions'].split(', '):
-                questions_dict[q] = questions_dict.get(q, 0) + 1
+        question_counts = results_table.question_counts(results)
         
-        if questions_dict:
-            questions_df = pd.DataFrame(list(questions_dict.items()), columns=['Question Type', 'Count'])
-            questions_df = questions_df.sort_values('Count', ascending=False)
+        if len(question_counts):
+            questions_df = pd.DataFrame({'Question Type': question_counts.index, 'Count': question_counts.to_numpy()})
             
             col1, col2 = st.columns(2)
             
@@ -867,12 +818,9 @@ elif page == "📈 Statistics":
         # Timeframe analysis
         st.markdown("### ⏰ Customer Urgency Timeline")
         
-        timeframes = {}
-        for r in results:
-            if r['timeframe'] != 'Not specified':
-                timeframes[r['timeframe']] = timeframes.get(r['timeframe'], 0) + 1
+        timeframes = results_table.counts(results, 'timeframe').drop(results_table.NOT_SPECIFIED, errors='ignore')
         
-        if timeframes:
+        if len(timeframes):
             col1, col2, col3 = st.columns(3)
             
             urgent = timeframes.get('Today', 0) + timeframes.get('Tomorrow', 0)
@@ -0,0 +1,268 @@
+# benchmark.py - stage timings for the analysis pipeline on synthetic conversation sheets
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+
+try:
+    import resource
+except ImportError:  # Windows: peak memory comes from tracemalloc instead
+    resource = None
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+BASELINE_FILE = config.LOGS_DIR / 'benchmark_baseline.json'
+STAGES = ['load', 'group', 'product_detection', 'question_detection', 'scoring', 'report_writing']
+
+# Message shapes seen in real exports: English, Sinhala and Singlish, with and without a product
+TEMPLATES = [
+    '{alias} available?',
+    'how much is the {alias}',
+    'price of {alias} {storage}?',
+    'can I pay by card for {alias}',
+    'I will come tomorrow to buy {alias}',
+    'do you deliver {alias} to kandy',
+    '{alias} warranty?',
+    'what colors in {alias}? need it asap',
+    '{alias} තියෙනවද?',
+    '{alias} කීයද?',
+    '{alias} price eka kiyada?',
+    'heta enawa {alias} ganna',
+    '{alias} delivery karanawada?',
+    'ada ennam {alias} ekak thiyaganna',
+    '{alias} {storage} stock thiyenawada? මිල කීයද',
+]
+NO_PRODUCT_MESSAGES = [
+    'hi', 'ok thanks', 'මට උදව් කරන්න', 'location eka kohenda?', 'are you open today?',
+    'bank transfer ok?', 'thank you!', 'ස්තූතියි',
+]
+STORAGE = ['64gb', '128gb', '256gb', '512gb', '1tb']
+
+
+def make_corpus(rows, seed=0):
+    """Synthetic conversation sheet with REQUIRED_COLUMNS + post_product and processed"""
+    from product_detector import ProductDetector
+
+    rng = np.random.default_rng(seed)
+    catalog = ProductDetector().products
+    aliases = [alias for models in catalog.values() for names in models.values() for alias in names]
+    model_names = [name.title() for models in catalog.values() for name in models]
+
+    # Repeat customers: a few users send most messages
+    users = [f'user_{i:05d}' for i in range(max(10, rows // 8))]
+    weights = 1 / np.arange(1, len(users) + 1)
+    weights /= weights.sum()
+
+    messages = []
+    for template_index, alias, storage in zip(
+        rng.integers(0, len(TEMPLATES) + 2, rows),
+        rng.choice(aliases, rows),
+        rng.choice(STORAGE, rows),
+    ):
+        if template_index >= len(TEMPLATES):
+            messages.append(str(rng.choice(NO_PRODUCT_MESSAGES)))
+        else:
+            messages.append(TEMPLATES[template_index].format(alias=alias, storage=storage))
+
+    start = datetime(2026, 1, 1, 9)
+    post_products = rng.choice(model_names + [''] * len(model_names), rows)
+    return pd.DataFrame({
+        'username': rng.choice(users, rows, p=weights),
+        'message': messages,
+        'post_product': post_products,
+        'date': [start + timedelta(minutes=int(m)) for m in np.sort(rng.integers(0, 7 * 24 * 60, rows))],
+        'processed': 'no',
+    })
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far (peak traced Python memory where `resource` is missing)"""
+    if resource is None:  # tracemalloc is started by run()
+        return round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_size(rows, workdir, analyzer):
+    """Time every stage on a `rows`-row sheet; returns the per-stage results"""
+    import analysis_pipeline
+    import ingest
+    import intent_scoring
+    import results_table
+
+    path = workdir / f'bench_{rows}.xlsx'
+    make_corpus(rows).to_excel(path, index=False)
+
+    stages = {}
+
+    def timed(name, count, fn):
+        started = time.perf_counter()
+        value = fn()
+        seconds = time.perf_counter() - started
+        stages[name] = {
+            'seconds': round(seconds, 4),
+            'rows_per_sec': round(count / seconds, 1) if seconds else None,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        return value
+
+    df = timed('load', rows, lambda: ingest.read_frame(path))
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    timed('group', rows, lambda: analysis_pipeline.group_messages(df))
+
+    texts = [str(m).strip() for m in df['message']]
+    post_products = [str(p).strip() if not pd.isna(p) else '' for p in df['post_product']]
+    products = timed('product_detection', rows, lambda: analyzer.product_detector.detect_products_batch(texts, post_products))
+
+    def detect_questions():
+        questions = analyzer.question_analyzer.analyze_questions_batch(texts)
+        return questions, [analyzer.question_analyzer.scan_signals(t) for t in texts]
+
+    questions, signals = timed('question_detection', rows, detect_questions)
+
+    history = df.groupby('username').cumcount().tolist()
+    scored = timed('scoring', rows, lambda: intent_scoring.score_batch(
+        urgent_questions=[sum(1 for q in qs if q['urgency'] == 'high') for qs in questions],
+        ready_to_buy=[s['ready_to_buy'] for s in signals],
+        timeframe=[s['timeframe'] for s in signals],
+        history_count=history,
+        urgency_modifier=[s['urgency_modifier'] for s in signals],
+    ))
+
+    results = results_table.build(df.assign(message=texts), pd.concat([pd.DataFrame({
+        'product': [analyzer.product_detector.get_primary_product(p) for p in products],
+        'questions': [analyzer.question_analyzer.format_questions_list(q) for q in questions],
+        'timeframe': [s['timeframe'] for s in signals],
+        'ready_to_buy': [s['ready_to_buy'] for s in signals],
+        'history_count': history,
+    }), scored], axis=1))
+    timed('report_writing', rows, lambda: analyzer._generate_reports(results, f'bench-{rows}'))
+
+    total = sum(stage['seconds'] for stage in stages.values())
+    return {
+        'rows': rows,
+        'stages': stages,
+        'total_seconds': round(total, 4),
+        'rows_per_sec': round(rows / total, 1) if total else None,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run(sizes=None, use_ai=False):
+    """Benchmark every size in a scratch directory (removed afterwards); returns the JSON-able report"""
+    sizes = sizes or DEFAULT_SIZES
+    if resource is None and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    with tempfile.TemporaryDirectory(prefix='ig-bench-', ignore_cleanup_errors=True) as tmp:
+        workdir = Path(tmp)
+
+        # Keep benchmark output and state out of the real folders, and measure real work (no cache)
+        config.DAILY_REPORTS = workdir / 'daily'
+        config.PRIORITY_REPORTS = workdir / 'priority'
+        config.WEEKLY_REPORTS = workdir / 'weekly'
+        config.STATE_DIR = workdir / 'state'
+        config.STATE_DB = config.STATE_DIR / 'analyzer_state.sqlite'
+        config.ANALYSIS_CACHE_ENABLED = False
+        config.AI_LOAD_MODE = 'eager' if use_ai else 'off'
+
+        from daily_analyzer import DailyAnalyzer
+
+        started = time.perf_counter()
+        analyzer = DailyAnalyzer()
+        setup_seconds = time.perf_counter() - started
+
+        report = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'ai': use_ai,
+                'inference_backend': config.INFERENCE_BACKEND,
+                'cascade_mode': config.CASCADE_MODE,
+                'memory': 'rss' if resource is not None else 'tracemalloc',
+                'setup_seconds': round(setup_seconds, 4),
+            },
+            'runs': {},
+        }
+        try:
+            for rows in sizes:
+                print(f'⏱️  Benchmarking {rows} rows...')
+                report['runs'][str(rows)] = run_size(rows, workdir, analyzer)
+        finally:
+            analyzer.close()
+    return report
+
+
+def compare(report, baseline, tolerance=0.2):
+    """Stages more than `tolerance` slower than the baseline, as (size, stage, base s, now s, ratio)"""
+    regressions = []
+    for size, current in report['runs'].items():
+        previous = baseline.get('runs', {}).get(size)
+        if not previous:
+            continue
+        for stage, timing in current['stages'].items():
+            before = previous['stages'].get(stage, {}).get('seconds')
+            if not before:
+                continue
+            ratio = timing['seconds'] / before
+            if ratio > 1 + tolerance:
+                regressions.append((size, stage, before, timing['seconds'], round(ratio, 2)))
+    return regressions
+
+
+def print_report(report):
+    for size, result in report['runs'].items():
+        print(f"\n📊 {size} rows - {result['total_seconds']:.2f}s total, "
+              f"{result['rows_per_sec']} rows/s, peak {result['peak_rss_mb']} MB")
+        for stage in STAGES:
+            timing = result['stages'][stage]
+            print(f"   {stage:<20} {timing['seconds']:>9.3f}s  {timing['rows_per_sec'] or 0:>12,.0f} rows/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the analysis pipeline on synthetic data')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Sheet sizes in rows')
+    parser.add_argument('--ai', action='store_true', help='Include the zero-shot model (slow on large sizes)')
+    parser.add_argument('--output', help='Where to write the JSON report (default: logs/benchmark_<time>.json)')
+    parser.add_argument('--baseline', default=str(BASELINE_FILE), help='Baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown per stage (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    config.setup_directories()
+    report = run(args.sizes, use_ai=args.ai)
+    print_report(report)
+
+    output = Path(args.output) if args.output else config.LOGS_DIR / f"benchmark_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.write_text(json.dumps(report, indent=2))
+    print(f'\n💾 Report: {output}')
+
+    baseline_path = Path(args.baseline)
+    regressions = []
+    if baseline_path.exists():
+        regressions = compare(report, json.loads(baseline_path.read_text()), args.tolerance)
+        if regressions:
+            print(f'\n🚨 Slower than baseline ({baseline_path}):')
+            for size, stage, before, now, ratio in regressions:
+                print(f'   {size} rows / {stage}: {before:.3f}s -> {now:.3f}s (x{ratio})')
+        else:
+            print(f'\n✅ No stage slower than baseline by more than {args.tolerance:.0%}')
+
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f'📌 Saved as baseline: {baseline_path}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
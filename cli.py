@@ -0,0 +1,150 @@
+# cli.py - non-interactive command line: analyze, watch, bench, warmup
+import argparse
+import contextlib
+import io
+import sys
+import time
+
+import config
+
+STDIO = '-'
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='cli.py', description='Instagram message analyzer (scriptable; safe for cron and pipes)'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    analyze = commands.add_parser('analyze', help='Analyze the new messages of one export')
+    analyze.add_argument('--input', default=str(config.DATA_FILE),
+                         help="Export (.xlsx, .csv or .jsonl), or '-' for JSONL on stdin")
+    analyze.add_argument('--output', help="Write the analysed messages as JSONL to this file ('-' for stdout)")
+    analyze.add_argument('--since', help='Only analyse messages dated on/after this date (e.g. 2026-01-31)')
+    _add_run_options(analyze)
+
+    watch = commands.add_parser('watch', help='Analyze exports dropped in an inbox folder, then archive them')
+    watch.add_argument('--inbox', default=str(config.INBOX_DIR), help='Folder to watch')
+    watch.add_argument('--archive', default=str(config.PROCESSED_DIR), help='Where processed files are moved')
+    watch.add_argument('--interval', type=float, default=config.WATCH_INTERVAL, help='Seconds between polls')
+    watch.add_argument('--once', action='store_true', help='Process what is there now and exit')
+    _add_run_options(watch)
+
+    # Everything after `bench` (including --help) goes to benchmark.py
+    commands.add_parser('bench', add_help=False, help='Run the performance benchmark (options as in benchmark.py)')
+
+    warmup = commands.add_parser('warmup', help='Download/export and load the AI model once so later runs start warm')
+    warmup.add_argument('--backend', help='Inference backend to warm (default: config.INFERENCE_BACKEND)')
+    return parser
+
+
+def _add_run_options(parser):
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for detection')
+    parser.add_argument('--no-ai', action='store_true', help='Rule-based detection only (skip the AI model)')
+    parser.add_argument('--verbose', action='store_true', help='Print the breakdown of every message')
+
+
+def _make_analyzer(args):
+    from daily_analyzer import DailyAnalyzer
+
+    if args.no_ai:
+        config.AI_LOAD_MODE = 'off'
+    return DailyAnalyzer(workers=args.workers, verbose=args.verbose or None)
+
+
+def run_analyze(args):
+    import results_table
+
+    # With JSONL on stdout, progress output moves to stderr so the stream stays clean
+    progress = contextlib.redirect_stdout(sys.stderr) if args.output == STDIO else contextlib.nullcontext()
+    with progress:
+        if args.input == STDIO:
+            # stdin can't be re-read, so buffer it for the header check + chunked read
+            source, fmt = io.StringIO(sys.stdin.read()), 'jsonl'
+            source.name = '<stdin>'
+        else:
+            source, fmt = args.input, None
+        analyzer = _make_analyzer(args)
+        try:
+            results = analyzer.analyze_today(source, fmt=fmt, since=args.since)
+        finally:
+            analyzer.close()
+    if results is None:
+        return 1
+
+    if args.output:
+        report = results_table.for_report(results)
+        if args.output == STDIO:
+            report.to_json(sys.stdout, orient='records', lines=True, force_ascii=False, date_format='iso')
+            sys.stdout.flush()
+        else:
+            report.to_json(args.output, orient='records', lines=True, force_ascii=False, date_format='iso')
+            print(f"💾 {len(report)} results: {args.output}", file=sys.stderr)
+    return 0
+
+
+def run_watch(args):
+    """Process exports dropped in the inbox with one resident analyzer (see watcher.InboxWatcher)"""
+    from watcher import InboxWatcher
+
+    analyzer = _make_analyzer(args)
+    try:
+        # --once processes whatever is there, however recently it was written
+        InboxWatcher(analyzer, args.inbox, args.archive, interval=args.interval,
+                     settle_seconds=0 if args.once else None).run(once=args.once)
+    finally:
+        analyzer.close()
+    return 0
+
+
+def run_bench(args, bench_args):
+    import benchmark
+
+    return benchmark.main(bench_args)
+
+
+def run_warmup(args):
+    """Load the model eagerly once: fills the Hugging Face cache (and the ONNX export) for later runs"""
+    import analysis_pipeline
+    import model_registry
+    from product_detector import ProductDetector
+    from question_analyzer import QuestionAnalyzer
+
+    config.AI_LOAD_MODE = 'eager'
+    if args.backend:
+        config.INFERENCE_BACKEND = args.backend
+    config.setup_directories()
+
+    started = time.perf_counter()
+    product_detector, question_analyzer = ProductDetector(), QuestionAnalyzer()
+    ai_model = model_registry.get_model()
+    print(f"🤖 Model {ai_model.model_id} ({ai_model.backend}): {ai_model.status} "
+          f"in {time.perf_counter() - started:.1f}s")
+    if not ai_model.is_ready():
+        print(f"❌ {ai_model.load_error}")
+        return 1
+
+    # One small batch so the first real run doesn't pay for lazy initialisation either
+    started = time.perf_counter()
+    analysis_pipeline.analyze_batch(product_detector, question_analyzer,
+                                    ['iPhone 15 price?', 'MacBook Air M2 තියෙනවද?'])
+    print(f"🔥 Warm-up batch in {time.perf_counter() - started:.2f}s"
+          + (f" | fast tier v{ai_model.fast_tier.version}" if ai_model.fast_tier is not None else ""))
+    return 0
+
+
+COMMANDS = {'analyze': run_analyze, 'watch': run_watch, 'warmup': run_warmup}
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == 'bench':
+        return run_bench(args, extra)
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    return COMMANDS[args.command](args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
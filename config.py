@@ -11,10 +11,24 @@ PRIORITY_REPORTS = REPORTS_DIR / "priority"
 WEEKLY_REPORTS = REPORTS_DIR / "weekly"
 
 ARCHIVE_DIR = PROJECT_ROOT / "archive"
+PROCESSED_DIR = ARCHIVE_DIR / "processed"  # inputs move here once analysed
+FAILED_DIR = ARCHIVE_DIR / "failed"  # inputs that could not be read
+INBOX_DIR = PROJECT_ROOT / "inbox"  # drop folder polled by `python cli.py watch`
 LOGS_DIR = PROJECT_ROOT / "logs"
+CACHE_DIR = PROJECT_ROOT / "cache"
+MODELS_DIR = PROJECT_ROOT / "models"  # exported / trained model files
+
+# Processed message IDs + analysis results (the Excel file is import/export only)
+STATE_DIR = PROJECT_ROOT / "state"
+STATE_DB = STATE_DIR / "analyzer_state.sqlite"
 
 REQUIRED_COLUMNS = ['username', 'message', 'date']
 
+# Exports are read and analysed this many rows at a time, so memory stays flat
+INGEST_CHUNK_SIZE = 5000
+# The app analyses this many conversations per step of a background job (partial results appear after each)
+APP_JOB_CHUNK_SIZE = 200
+
 INTENT_THRESHOLDS = {
     'very_high': 0.8,
     'high': 0.6,
@@ -22,7 +36,69 @@ INTENT_THRESHOLDS = {
     'low': 0.0
 }
 
+# Zero-shot inference: one shared multilingual NLI model serves every analyzer
+NLI_MODEL_ID = "joeddav/xlm-roberta-large-xnli"
+NLI_HYPOTHESIS_TEMPLATE = "This example is {}."
+NLI_RESULT_CACHE_SIZE = 20000
+
+# How the model runs on CPU: "pytorch" (FP32), "pytorch-int8" (dynamic int8
+# quantization) or "onnx" (ONNX Runtime, needs optimum[onnxruntime]).
+# Check a backend's labels against FP32 with: python inference_backends.py --backend onnx
+INFERENCE_BACKEND = "pytorch"
+
+# Distilled char n-gram classifier (train with: python fast_classifier.py --input export.xlsx).
+# When trained, it answers the texts it is confident about and the NLI model only runs on the rest.
+FAST_TIER_ENABLED = True
+FAST_TIER_PATH = MODELS_DIR / "fast_tier.joblib"
+FAST_TIER_THRESHOLD = 0.85  # default for `fast_classifier.py --threshold`; a trained tier keeps its own
+
+# When the model loads: "background" (thread started at startup), "lazy" (thread
+# started on the first AI request), "eager" (block at startup, old behaviour) or
+# "off" (rules only). Until it is ready the rule-based detectors answer every request.
+AI_LOAD_MODE = "background"
+# How long the batch analyzer waits for the model before going rules-only (None = forever)
+AI_WAIT_TIMEOUT = None
+
+# Detections are cached on disk by message text, post product, model and rule tables
+ANALYSIS_CACHE_ENABLED = True
+ANALYSIS_CACHE_DB = CACHE_DIR / "analysis_cache.sqlite"
+ANALYSIS_CACHE_MAX_ENTRIES = 200000
+
+# Cascade: rules first, and the model only for messages they can't settle. Products skip
+# the model when post_product or an unambiguous alias names them; questions skip it
+# when keywords already found a question type.
+CASCADE_MODE = False
+
+# Messages are sent to the model in mini-batches of this size
+AI_BATCH_SIZE = 16
+AI_MAX_CHARS = 300
+
+# Report files: "xlsx" (streamed with xlsxwriter; Summary, Messages, Priority and
+# Product Demand sheets), "csv" or "parquet" (needs pyarrow; keeps the typed columns)
+REPORT_FORMAT = "xlsx"
+
+# Logging: rotating JSON lines in LOGS_DIR/analyzer.log
+LOG_LEVEL = "INFO"
+LOG_MAX_BYTES = 5_000_000
+LOG_BACKUP_COUNT = 5
+# Print the 4-6 line breakdown of every message during batch runs (slow on big backlogs)
+VERBOSE_OUTPUT = False
+
+# Local HTTP scoring service (python scoring_service.py). Concurrent requests are
+# coalesced into one model batch of up to SERVICE_MAX_BATCH messages, waiting at
+# most SERVICE_MAX_WAIT_MS for more to arrive.
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_MAX_BATCH = 64
+SERVICE_MAX_WAIT_MS = 15
+SERVICE_MAX_MESSAGES = 1000  # per request
+
+# Inbox watcher: poll interval, and how long a file must sit unchanged before it is
+# picked up (so half-copied exports are not read)
+WATCH_INTERVAL = 10
+WATCH_SETTLE_SECONDS = 5
+
 def setup_directories():
-    for d in [DAILY_REPORTS, PRIORITY_REPORTS, WEEKLY_REPORTS, ARCHIVE_DIR, LOGS_DIR]:
+    for d in [DAILY_REPORTS, PRIORITY_REPORTS, WEEKLY_REPORTS, ARCHIVE_DIR, PROCESSED_DIR, LOGS_DIR, CACHE_DIR, STATE_DIR, MODELS_DIR]:
         d.mkdir(parents=True, exist_ok=True)
     return True
\ No newline at end of file
@@ -0,0 +1,27 @@
+# conversation_history.py - per-user counts of already processed messages
+from collections import Counter
+
+
+class HistoryCounter:
+    """Lookup of how many processed messages each username already has.
+
+    Built once per run with a single value_counts() instead of filtering the
+    whole sheet for every message, and updated in place as messages are
+    marked processed so later messages from the same user see them.
+    """
+
+    def __init__(self, counts=None):
+        self.counts = Counter(counts or {})
+
+    @classmethod
+    def from_frame(cls, df):
+        if 'processed' not in df.columns:
+            return cls()
+        processed = df.loc[df['processed'] == 'yes', 'username']
+        return cls(processed.value_counts().to_dict())
+
+    def get(self, username):
+        return self.counts.get(username, 0)
+
+    def record(self, username, count=1):
+        self.counts[username] += count
@@ -1,31 +1,68 @@
 
 # daily_analyzer.py - MAIN SCRIPT
+import logging
+import sys
 import pandas as pd
 import os
 from datetime import datetime, date
 from product_detector import ProductDetector
 from question_analyzer import QuestionAnalyzer
 
+import analysis_pipeline
 import config
+import ingest
+import instrumentation
+import model_registry
+import report_writer
+import results_table
+import state_store
+from conversation_history import HistoryCounter
+from logging_config import get_logger, setup_logging
+from parallel_analysis import AnalysisPool
+from state_store import StateStore
+
+logger = get_logger('daily_analyzer')
 
 class DailyAnalyzer:
-    def __init__(self):
+    def __init__(self, workers=1, verbose=None):
         print("🚀 Instagram Message Analyzer Starting...\n")
         print("📦 Initializing AI-Enhanced Analysis System...\n")
         config.setup_directories()
-        
-        # Initialize all analyzers (they load AI models automatically)
+        setup_logging()
+        # Per-message console output is opt-in; big backlogs spend real time printing it
+        self.verbose = config.VERBOSE_OUTPUT if verbose is None else verbose
+        self.state = StateStore()
+        
+        # With several workers, detection (and the AI model) lives in the worker processes
+        self.pool = None
+        if workers > 1:
+            print(f"Starting {workers} worker processes...")
+            self.pool = AnalysisPool(workers)
+            config.AI_LOAD_MODE = 'lazy'  # the parent only scores, so it never needs the model
+        
+        # Initialize all analyzers (the shared AI model loads in the background)
         print("Loading Product Detector...")
         self.product_detector = ProductDetector()
         
         print("Loading Question Analyzer...")
         self.question_analyzer = QuestionAnalyzer()
         
-        print("✅ All systems ready! (Hybrid AI + Rule-Based Analysis Active)\n")
+        print("✅ Rule-based analysis ready! (AI model status: "
+              f"{model_registry.get_model().status})\n")
     
-    def analyze_today(self, excel_file=None):
+    @instrumentation.profiled('daily_analyzer')
+    def analyze_today(self, excel_file=None, fmt=None, since=None, report_tag=None):
+        """Analyze the new messages of an export (a path or an open file; `fmt` if it has no name).
+
+        With `since`, older messages are left for a later run. `report_tag` is
+        added to the report file names (so several exports a day don't
+        overwrite each other). Returns the typed results (see results_table),
+        or None if the export could not be read.
+        """
         if excel_file is None:
             excel_file = config.DATA_FILE
+        if since is not None:
+            since = pd.Timestamp(since)
         
         today = date.today().strftime('%Y-%m-%d')
         
@@ -34,176 +71,229 @@ class DailyAnalyzer:
         print("="*70 + "\n")
         
         # Load Excel
-        if not os.path.exists(excel_file):
+        if isinstance(excel_file, (str, os.PathLike)) and not os.path.exists(excel_file):
             print(f"❌ File not found: {excel_file}")
-            self._create_template(excel_file)
-            print(f"✅ Template created: {excel_file}\n")
+            if str(excel_file).lower().endswith('.xlsx'):
+                self._create_template(excel_file)
+                print(f"✅ Template created: {excel_file}\n")
             return
         
         try:
-            df = pd.read_excel(excel_file)
+            ingest.validate_columns(ingest.read_header(excel_file, fmt))
         except Exception as e:
-            print(f"❌ Error reading Excel: {e}\n")
-            return
-        
-        # Add processed column
-        if 'processed' not in df.columns:
-            df['processed'] = 'no'
-        
-        # Filter NEW messages only
-        new_messages = df[df['processed'] == 'no'].copy()
-        
-        print(f"📊 Total: {len(df)} | Already processed: {len(df) - len(new_messages)} | NEW: {len(new_messages)}\n")
-        
-        if len(new_messages) == 0:
-            print("✅ No new messages!\n")
+            print(f"❌ Error reading {excel_file}: {e}\n")
+            logger.error("Could not read %s: %s", excel_file, e)
             return
         
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
-        
-        # Process
-        results = []
-        stats = {'total': 0, 'very_high': 0, 'high': 0, 'medium': 0, 'low': 0}
-        
-        print("🔄 Analyzing...\n" + "-"*70)
-        
-        for idx, row in new_messages.iterrows():
-            username = str(row['username']).strip()
-            message = str(row['message']).strip()
-            
-            if not message or message == 'nan':
+        # Process the export chunk by chunk so memory stays flat however big it is
+        instrumentation.get_metrics().reset()
+        chunk_results = []
+        analysed = 0
+        total_rows = 0
+        new_count = 0
+        recorded = 0
+        
+        for chunk in instrumentation.timed_iter('ingest.read', ingest.iter_chunks(excel_file, fmt=fmt)):
+            total_rows += len(chunk)
+            with instrumentation.timer('state.select_new'):
+                new_messages = self._select_new(chunk, since)
+            if len(new_messages) == 0:
                 continue
             
-            history_count = len(df[(df['username'] == username) & (df['processed'] == 'yes')])
-            
-            print(f"\n[{stats['total']+1}/{len(new_messages)}] @{username}")
-            print(f"Message: {message[:60]}...")
-            
-            # Analyze
-            analysis = self._analyze_message(row, history_count)
-            
-            print(f"   📱 {analysis['product']}")
-            print(f"   ❓ {analysis['questions']}")
-            print(f"   🎯 Intent: {analysis['intent']} ({analysis['intent_score']})")
-            
-            if analysis['intent'] in ['Very High', 'High']:
-                print(f"   🚨 PRIORITY!")
-            
-            # Store
-            results.append({
-                'date': row['date'],
-                'username': username,
-                'message': message,
-                'product': analysis['product'],
-                'questions': analysis['questions'],
-                'intent': analysis['intent'],
-                'intent_score': analysis['intent_score'],
-                'timeframe': analysis['timeframe'],
-                'ready': analysis['ready_to_buy'],
-                'customer_segment': analysis['customer_segment']
-            })
+            if new_count == 0:
+                if self.pool is None:
+                    self._wait_for_model()
+                else:
+                    print(f"🧵 Detection running on {self.pool.workers} worker processes\n")
+                print("🔄 Analyzing...\n" + "-"*70)
+            new_count += len(new_messages)
             
-            stats['total'] += 1
-            intent_key = analysis['intent'].lower().replace(' ', '_')
-            if intent_key in stats:
-                stats[intent_key] += 1
+            frame, records = self._analyze_chunk(new_messages, analysed)
+            chunk_results.append(frame)
+            analysed += len(frame)
+            if not self.verbose:
+                print(f"   ✓ {analysed} messages analysed")
             
-            # Mark processed
-            df.at[idx, 'processed'] = 'yes'
-            df.at[idx, 'intent'] = analysis['intent']
-            df.at[idx, 'product'] = analysis['product']
+            # Save: only this chunk's messages are written; the export is left untouched
+            with instrumentation.timer('state.record'):
+                self.state.record_results(records)
+                # Blank messages have nothing to analyse; record them so later runs don't count them as new
+                analysed_ids = {i for record in records for i in [record['message_id'], *record['grouped_ids']]}
+                blank = new_messages[~new_messages['message_id'].isin(analysed_ids)]
+                self.state.mark_skipped(zip(blank['message_id'], blank['username'].astype(str).str.strip(), blank['date']))
+            recorded += len(records)
+        
+        print(f"\n📊 Total: {total_rows} | Already processed: {total_rows - new_count} | NEW: {new_count}\n")
+        
+        if new_count == 0:
+            print("✅ No new messages!\n")
+            self._write_metrics(excel_file, total_rows, new_count)
+            return results_table.empty()
         
-        print("\n" + "-"*70)
+        print("-"*70)
+        print(f"\n💾 Recorded {recorded} messages in {self.state.path}")
         
-        # Save
-        df.to_excel(excel_file, index=False)
-        print(f"\n💾 Updated: {excel_file}")
+        if config.CASCADE_MODE and self.pool is None:
+            for name, counts in [('products', self.product_detector.cascade_counts),
+                                 ('questions', self.question_analyzer.cascade_counts)]:
+                checked = counts['skipped'] + counts['sent_to_ai']
+                if checked:
+                    print(f"🪜 Cascade skipped the AI model for {counts['skipped']}/{checked} {name} lookups "
+                          f"({counts['skipped'] / checked:.0%})")
         
-        # Reports
-        if results:
-            self._generate_reports(results, today, stats)
+        ai_model = model_registry.get_model()
+        if ai_model.fast_checked:
+            print(f"⚡ Fast tier answered {ai_model.fast_hits} of {ai_model.fast_checked} AI lookups")
         
-        self._print_summary(stats, results)
+        # Reports
+        results = results_table.concat(chunk_results)
+        if len(results):
+            with instrumentation.timer('reports'):
+                self._generate_reports(results, today, report_tag)
+        
+        self._print_timings(self._write_metrics(excel_file, total_rows, new_count))
+        self._print_summary(results)
+        return results
     
-    def _analyze_message(self, row, history_count):
-        text = str(row['message']).strip()
-        post_product = str(row.get('post_product', '')).strip()
-        
-        products = self.product_detector.detect_products(text, post_product)
-        primary_product = self.product_detector.get_primary_product(products)
-        
-        questions = self.question_analyzer.analyze_questions(text)
-        all_questions = self.question_analyzer.format_questions_list(questions)
-        
-        ready_to_buy = self.question_analyzer.is_ready_to_buy(text)
-        timeframe = self.question_analyzer.detect_timeframe(text)
-        
-
-        # Calculate intent with enhanced scoring
-        score = 0.3
-        urgent_q = sum(1 for q in questions if q['urgency'] == 'high')
-        score += urgent_q * 0.15
-        if ready_to_buy:
-            score += 0.3
-        if timeframe in ['Today', 'Tomorrow']:
-            score += 0.25
-        if history_count > 0:
-            score += min(history_count * 0.05, 0.15)
-        
-
-        # Boost for urgency modifiers
-        urgency_modifier = self.question_analyzer.detect_urgency_modifiers(text)
-        score += min(urgency_modifier * 0.02, 0.2)
-        
-        score = min(score, 1.0)
-        
-        if score >= 0.8:
-            intent = "Very High"
-        elif score >= 0.6:
-            intent = "High"
-        elif score >= 0.4:
-            intent = "Medium"
+    def close(self):
+        """Shut down the worker processes, if any, and close the state store"""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+        self.state.close()
+    
+    def _select_new(self, chunk, since=None):
+        """Rows of a chunk that still need analysing (tagged with their message_id)"""
+        if 'processed' not in chunk.columns:
+            chunk['processed'] = 'no'
+        
+        ids = state_store.message_ids(chunk)
+        known = self.state.known_ids(ids)
+        
+        # Rows the export itself marks processed are imported once, so they count as history
+        imports = [
+            (message_id, str(username).strip(), msg_date)
+            for message_id, username, msg_date, flag in zip(ids, chunk['username'], chunk['date'], chunk['processed'])
+            if flag == 'yes' and message_id not in known
+        ]
+        if imports:
+            self.state.mark_imported(imports)
+            known.update(message_id for message_id, _, _ in imports)
+        
+        # NEW messages only (not flagged in the export, not in the state store)
+        is_new = [flag == 'no' and message_id not in known for message_id, flag in zip(ids, chunk['processed'])]
+        if since is not None:
+            recent = (pd.to_datetime(chunk['date'], errors='coerce') >= since).tolist()
+            is_new = [new and ok for new, ok in zip(is_new, recent)]
+        new_messages = chunk[is_new].copy()
+        new_messages['message_id'] = [message_id for message_id, ok in zip(ids, is_new) if ok]
+        return new_messages
+    
+    def _wait_for_model(self):
+        # Batch runs want AI results, so give the model a chance to finish loading
+        ai_model = model_registry.get_model()
+        if not ai_model.is_ready():
+            print("⏳ Waiting for AI model...")
+        with instrumentation.timer('model.wait'):
+            ready = ai_model.wait_until_ready(config.AI_WAIT_TIMEOUT)
+        if ready:
+            print("🤖 Hybrid AI + Rule-Based Analysis Active\n")
+        elif ai_model.fast_tier_ready():
+            print("⚡ AI model unavailable - fast tier answers what it is sure about, rules do the rest\n")
         else:
-            intent = "Low"
-        
-        # Customer segmentation
-        customer_segment = self.question_analyzer.segment_customer(text, history_count, score)
+            print("⚠️ AI model unavailable - using rule-based analysis only\n")
+    
+    def _analyze_chunk(self, new_messages, total=0):
+        """Analyze one chunk of new messages; returns (typed result frame, state records).
+
+        `total` is how many messages earlier chunks analysed (for the verbose numbering).
+        """
+        # Same user + same day = one conversation, exactly as the app groups them
+        # (a user's day that straddles two chunks is analysed as two conversations)
+        with instrumentation.timer('group'):
+            groups = analysis_pipeline.group_messages(new_messages)
+        messages = groups['message'].str.strip()
+        batch = groups[messages != '']
+        batch_texts = messages[messages != ''].tolist()
+        batch_products = batch['post_product'].tolist()
+        usernames = batch['username'].str.strip().tolist()
+        message_ids = new_messages['message_id']
+        
+        # Processed-message counts per user; earlier new messages count towards later ones
+        # (earlier chunks are already in the state store by the time this one runs)
+        with instrumentation.timer('history'):
+            history = HistoryCounter(self.state.user_counts(usernames))
+            history_counts = []
+            for username, rows in zip(usernames, batch['rows']):
+                history_counts.append(history.get(username))
+                history.record(username, len(rows))
+        
+        # Detection + scoring for every message in the chunk in one batched pass
+        analyses = analysis_pipeline.analyze_batch(
+            self.product_detector, self.question_analyzer,
+            batch_texts, batch_products, history_counts, pool=self.pool
+        )
+        
+        chunk_results = results_table.build(
+            batch.assign(username=usernames, message=batch_texts), analyses
+        )
+        report = results_table.for_report(chunk_results)
+        
+        records = []
+        for group, row in zip(batch.itertuples(index=False), report.itertuples(index=False)):
+            ids = message_ids.loc[group.rows].tolist()
+            
+            if self.verbose:
+                total += 1
+                print(f"\n[{total}] @{row.username}")
+                print(f"Message: {row.message[:60]}...")
+                print(f"   📱 {row.product}")
+                print(f"   ❓ {row.questions}")
+                print(f"   🎯 Intent: {row.intent} ({row.intent_score})")
+                
+                if row.intent in results_table.PRIORITY_INTENTS:
+                    print(f"   🚨 PRIORITY!")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Analysed message", extra={'fields': {
+                    'message_ids': ids, 'username': row.username, 'product': row.product,
+                    'questions': row.questions, 'intent': row.intent, 'intent_score': row.intent_score,
+                }})
+            
+            records.append(dict(row._asdict(), message_id=ids[0], grouped_ids=ids[1:]))
         
-        return {
-            'product': primary_product,
-            'questions': all_questions,
-            'intent': intent,
-            'intent_score': f"{score:.0%}",
-            'ready_to_buy': 'YES' if ready_to_buy else 'NO',
-            'timeframe': timeframe,
-            'customer_segment': customer_segment,
+        return chunk_results, records
+    
+    def _write_metrics(self, source, total_rows, new_count):
+        """Append this run's timers and counters to LOGS_DIR/metrics.jsonl and log the headline numbers"""
+        metrics = instrumentation.get_metrics()
+        run = {
+            'source': str(getattr(source, 'name', source)),
+            'rows': total_rows,
+            'new_messages': new_count,
+            'workers': self.pool.workers if self.pool else 1,
+            **instrumentation.run_rates(metrics.snapshot(), new_count),
         }
+        logger.info("Run complete", extra={'fields': run})
+        return metrics.write_summary('daily_analyzer', run)
+    
+    def _print_timings(self, record):
+        print("\n⏱️  TIMING (top stages)")
+        for name, timing in list(record['timings'].items())[:8]:
+            print(f"   {name:<24} {timing['seconds']:>8.2f}s  ({timing['calls']} calls)")
+        print(f"   {record['messages_per_sec']} messages/sec | model time {record['model_time_share']:.0%}"
+              + (f" | cache hits {record['cache_hit_rate']:.0%}" if record['cache_hit_rate'] is not None else "")
+              + (f" | reports written in {record['report_write_seconds']:.2f}s" if record['report_write_seconds'] else ""))
+        print(f"   Details: {config.LOGS_DIR / instrumentation.METRICS_FILE}")
     
-    def _generate_reports(self, results, today, stats):
+    def _generate_reports(self, results, today, tag=None):
         print("\n📄 Generating reports...")
-        
-        # Daily report
-        daily_file = config.DAILY_REPORTS / f"report_{today}.xlsx"
-        df = pd.DataFrame(results)
-        
-        with pd.ExcelWriter(daily_file, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Messages', index=False)
-            summary = pd.DataFrame({
-                'Metric': ['Date', 'Total', 'Very High', 'High', 'Medium', 'Low'],
-                'Value': [today, stats['total'], stats['very_high'], stats['high'], stats['medium'], stats['low']]
-            })
-            summary.to_excel(writer, sheet_name='Summary', index=False)
-        
-        print(f"   ✅ Daily: {daily_file}")
-        
-        # Priority
-        priority = [r for r in results if r['intent'] in ['High', 'Very High']]
-        if priority:
-            priority_file = config.PRIORITY_REPORTS / f"priority_{today}.xlsx"
-            pd.DataFrame(priority).to_excel(priority_file, index=False)
-            print(f"   🚨 Priority: {priority_file} ({len(priority)} customers)")
+        written = report_writer.write_reports(results, today, tag)
+        print(f"   ✅ Daily: {written['daily']}")
+        if written['priority'] is not None:
+            print(f"   🚨 Priority: {written['priority']} ({written['priority_rows']} customers)")
     
-    def _print_summary(self, stats, results):
+    def _print_summary(self, results):
+        stats = results_table.intent_stats(results)
         print("\n" + "="*70)
         print("📊 SUMMARY")
         print("="*70)
@@ -213,37 +303,34 @@ class DailyAnalyzer:
         print(f"⚠️  Medium: {stats['medium']}")
         print(f"ℹ️  Low: {stats['low']}")
         
-        priority = [r for r in results if r['intent'] in ['High', 'Very High']]
+        priority = results_table.for_report(results_table.priority(results))
         
-        if priority:
+        if len(priority):
             print(f"\n{'='*70}")
             print(f"🚨 PRIORITY CUSTOMERS")
             print(f"{'='*70}")
             
-            for p in priority:
-                print(f"\n👤 @{p['username']}")
-                print(f"   Product: {p['product']}")
-                print(f"   Questions: {p['questions']}")
-                print(f"   Intent: {p['intent']} ({p['intent_score']})")
-                print(f"   Timeframe: {p['timeframe']}")
-                if p['ready'] == 'YES':
+            for p in priority.itertuples(index=False):
+                print(f"\n👤 @{p.username}")
+                print(f"   Product: {p.product}")
+                print(f"   Questions: {p.questions}")
+                print(f"   Intent: {p.intent} ({p.intent_score})")
+                print(f"   Timeframe: {p.timeframe}")
+                if p.ready == 'YES':
                     print(f"   🔥 READY TO BUY!")
-                if p['intent'] == 'Very High':
+                if p.intent == 'Very High':
                     print(f"   ⚡ Reply in 30 mins!")
                 else:
                     print(f"   ⚠️  Reply in 2 hours!")
         
         # Products
-        products = {}
-        for r in results:
-            if r['product'] != 'Not specified':
-                products[r['product']] = products.get(r['product'], 0) + 1
+        products = results_table.product_demand(results)
         
-        if products:
+        if len(products):
             print(f"\n{'='*70}")
             print("📦 PRODUCT DEMAND")
             print(f"{'='*70}")
-            for prod, count in sorted(products.items(), key=lambda x: x[1], reverse=True)[:10]:
+            for prod, count in products.head(10).items():
                 print(f"   {prod}: {count} requests")
         
         print("\n" + "="*70)
@@ -264,24 +351,11 @@ class DailyAnalyzer:
         }
         pd.DataFrame(template_data).to_excel(file_path, index=False)
 
-def main():
-    print("""
-╔═══════════════════════════════════════════════════════════╗
-║  📱 INSTAGRAM MESSAGE ANALYZER                           ║
-╚═══════════════════════════════════════════════════════════╝
-
-Options:
-1. 📊 Analyze new messages
-2. ❌ Exit
-    """)
-    
-    choice = input("Choose (1-2): ").strip()
+def main(argv=None):
+    """`python daily_analyzer.py [options]` = `python cli.py analyze [options]` (no prompt, cron-safe)"""
+    import cli
     
-    if choice == '1':
-        analyzer = DailyAnalyzer()
-        analyzer.analyze_today()
-    else:
-        print("\n👋 Goodbye!\n")
+    return cli.main(['analyze', *(sys.argv[1:] if argv is None else argv)])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,231 @@
+# fast_classifier.py - distilled char n-gram tier in front of the zero-shot model
+import argparse
+import time
+
+import numpy as np
+
+import config
+from logging_config import get_logger
+
+logger = get_logger("fast_classifier")
+
+NO_PRODUCT = "__none__"
+
+
+class FastTier:
+    """Char n-gram logistic regression trained on the hybrid detector output.
+
+    predict() returns zero-shot style predictions ({'labels', 'scores'} per
+    label set) for the texts it is confident about and None for the rest,
+    which NLIModel then sends through the full model.
+    """
+
+    def __init__(self, vectorizer, product_model, question_model, label_sets, threshold=None, metrics=None, version=""):
+        self.vectorizer = vectorizer
+        self.product_model = product_model
+        self.question_model = question_model
+        self.label_sets = label_sets  # {"products": [...], "questions": [...]} at training time
+        self.threshold = threshold or config.FAST_TIER_THRESHOLD
+        self.metrics = metrics or {}
+        self.version = version
+
+    def covers(self, label_sets):
+        """True if the registered label sets are the ones this tier was trained for"""
+        return all(
+            name in self.label_sets and list(labels) == self.label_sets[name]
+            for name, (labels, _) in label_sets.items()
+        )
+
+    def predict(self, texts):
+        features = self.vectorizer.transform([str(t).lower() for t in texts])
+        product_proba = self.product_model.predict_proba(features)
+        question_proba = self.question_model.predict_proba(features)
+        product_classes = list(self.product_model.classes_)
+        question_labels = self.label_sets["questions"]
+
+        results = []
+        for p_row, q_row in zip(product_proba, question_proba):
+            sure_product = p_row.max() >= self.threshold
+            sure_questions = all(q >= self.threshold or q <= 1 - self.threshold for q in q_row)
+            if not (sure_product and sure_questions):
+                results.append(None)
+                continue
+            # NO_PRODUCT is dropped, so "no product" comes out as low scores on every category
+            results.append({
+                "products": _ranked([(c, p) for c, p in zip(product_classes, p_row) if c != NO_PRODUCT]),
+                "questions": _ranked(list(zip(question_labels, q_row))),
+            })
+        return results
+
+
+def _ranked(pairs):
+    pairs = sorted(pairs, key=lambda x: x[1], reverse=True)
+    return {"labels": [label for label, _ in pairs], "scores": [float(score) for _, score in pairs]}
+
+
+def load_fast_tier(path=None):
+    """The trained tier, or None when not trained yet or scikit-learn is missing"""
+    path = path or config.FAST_TIER_PATH
+    if not path.exists():
+        return None
+    try:
+        import joblib  # type: ignore
+
+        tier = joblib.load(path)
+    except Exception as e:
+        logger.warning("Fast tier not loaded (%s): %s", path, e)
+        return None
+    # Keep the threshold the training metrics were measured at; config only fills in for older files
+    tier.threshold = getattr(tier, "threshold", None) or config.FAST_TIER_THRESHOLD
+    logger.info("Fast tier loaded (%s, trained %s, threshold %.2f)", path.name, tier.version, tier.threshold)
+    return tier
+
+
+def label_messages(texts):
+    """Teacher labels: the current ProductDetector / QuestionAnalyzer hybrid output per text"""
+    import model_registry
+    from product_detector import ProductDetector
+    from question_analyzer import QuestionAnalyzer
+
+    # The teacher must not be the tier being trained, so it gets its own model without one
+    teacher = model_registry.NLIModel(fast_tier_enabled=False)
+    product_detector = ProductDetector(ai_model=teacher)
+    question_analyzer = QuestionAnalyzer(ai_model=teacher)
+    if not teacher.wait_until_ready(config.AI_WAIT_TIMEOUT):
+        print("⚠️ AI model unavailable - teacher labels come from the rules only")
+
+    products = product_detector.detect_products_batch(texts)
+    questions = question_analyzer.analyze_questions_batch(texts)
+
+    categories = product_detector.product_categories
+    product_labels = [_product_label(found, categories) for found in products]
+    question_labels = [
+        sorted({q["type"] for q in found if q["type"] in question_analyzer.question_types})
+        for found in questions
+    ]
+    label_sets = {"products": list(categories), "questions": list(question_analyzer.question_types)}
+    return product_labels, question_labels, label_sets
+
+
+def _product_label(found, categories):
+    """Zero-shot category of the first detected product, or NO_PRODUCT"""
+    for product in found:
+        if product["source"] not in ("ai", "rules"):
+            continue
+        category = product["category"]
+        if category in categories:
+            return category
+        # Rule categories can be more specific than the zero-shot ones ("Sony PlayStation" -> "Sony")
+        for label in categories:
+            if category.startswith(label):
+                return label
+    return NO_PRODUCT
+
+
+def train(texts, threshold=None, holdout=0.2, seed=0):
+    """Label `texts` with the hybrid detectors and fit a FastTier; returns (tier, metrics)"""
+    try:
+        from sklearn.feature_extraction.text import HashingVectorizer  # type: ignore
+        from sklearn.linear_model import LogisticRegression  # type: ignore
+        from sklearn.multiclass import OneVsRestClassifier  # type: ignore
+        from sklearn.preprocessing import MultiLabelBinarizer  # type: ignore
+    except ImportError as e:
+        raise ImportError("Training the fast tier needs scikit-learn (pip install scikit-learn)") from e
+
+    texts = [str(t) for t in texts]
+    product_labels, question_labels, label_sets = label_messages(texts)
+    if len(set(product_labels)) < 2:
+        raise ValueError("Need messages with at least two different product labels to train")
+
+    vectorizer = HashingVectorizer(analyzer="char_wb", ngram_range=(2, 4), n_features=2 ** 18, alternate_sign=False)
+    features = vectorizer.transform([t.lower() for t in texts])
+    products = np.array(product_labels, dtype=object)
+    questions = MultiLabelBinarizer(classes=label_sets["questions"]).fit_transform(question_labels)
+
+    def fit(rows):
+        product_model = LogisticRegression(max_iter=1000, C=4.0)
+        product_model.fit(features[rows], products[rows])
+        question_model = OneVsRestClassifier(LogisticRegression(max_iter=1000, C=4.0))
+        question_model.fit(features[rows], questions[rows])
+        return product_model, question_model
+
+    # Agreement with the teacher on held-out messages
+    order = np.random.default_rng(seed).permutation(len(texts))
+    cut = int(len(texts) * (1 - holdout))
+    train_rows, test_rows = order[:cut], order[cut:]
+    metrics = {"messages": len(texts), "holdout": len(test_rows)}
+    if len(test_rows) and len(set(products[train_rows])) >= 2:
+        held_out = FastTier(vectorizer, *fit(train_rows), label_sets, threshold)
+        metrics.update(_agreement(held_out, [texts[i] for i in test_rows], products[test_rows], questions[test_rows]))
+
+    version = time.strftime("%Y%m%d-%H%M%S")
+    tier = FastTier(vectorizer, *fit(np.arange(len(texts))), label_sets, threshold, metrics, version)
+    return tier, metrics
+
+
+def _agreement(tier, texts, products, questions):
+    features = tier.vectorizer.transform([t.lower() for t in texts])
+    product_pred = tier.product_model.predict(features)
+    question_pred = tier.question_model.predict(features)
+    product_ok = product_pred == products
+    question_ok = (question_pred == questions).all(axis=1)
+    confident = np.array([p is not None for p in tier.predict(texts)])
+
+    def rate(mask):
+        return round(float(mask.mean()), 4) if len(mask) else None
+
+    return {
+        "product_agreement": rate(product_ok),
+        "question_agreement": rate(question_ok),
+        "coverage": rate(confident),
+        "product_agreement_confident": rate(product_ok[confident]),
+        "question_agreement_confident": rate(question_ok[confident]),
+    }
+
+
+def save(tier, path=None):
+    import joblib  # type: ignore
+
+    path = path or config.FAST_TIER_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(tier, path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the fast tier from the hybrid detector output")
+    parser.add_argument("--input", default=str(config.DATA_FILE), help="Historical export to learn from")
+    parser.add_argument("--limit", type=int, default=None, help="Use at most this many messages")
+    parser.add_argument("--threshold", type=float, default=config.FAST_TIER_THRESHOLD,
+                        help="Confidence needed to skip the zero-shot model (saved with the tier)")
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    import ingest
+
+    texts = []
+    for chunk in ingest.iter_chunks(args.input):
+        texts.extend(str(m).strip() for m in chunk["message"] if pd.notna(m) and str(m).strip())
+        if args.limit and len(texts) >= args.limit:
+            break
+    texts = texts[: args.limit] if args.limit else texts
+
+    print(f"🏷️  Labelling {len(texts)} messages with the hybrid detectors...")
+    # Go through the importable module so the saved tier unpickles as fast_classifier.FastTier
+    import fast_classifier
+
+    tier, metrics = fast_classifier.train(texts, threshold=args.threshold)
+    path = fast_classifier.save(tier)
+
+    print(f"\n✅ Fast tier saved: {path}")
+    print(f"   Held-out messages: {metrics['holdout']} | threshold {tier.threshold:.2f}")
+    for key in ("product_agreement", "question_agreement", "coverage",
+                "product_agreement_confident", "question_agreement_confident"):
+        if metrics.get(key) is not None:
+            print(f"   {key.replace('_', ' ')}: {metrics[key]:.1%}")
+    return metrics
+
+
+if __name__ == "__main__":
+    main()
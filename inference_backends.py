@@ -0,0 +1,141 @@
+# inference_backends.py - pluggable runtimes for the zero-shot NLI model
+import argparse
+import time
+
+import config
+from logging_config import get_logger
+
+logger = get_logger("inference_backends")
+
+# "pytorch" (FP32), "pytorch-int8" (dynamic int8 quantized Linear layers) or "onnx" (ONNX Runtime)
+BACKENDS = ("pytorch", "pytorch-int8", "onnx")
+
+
+def load_model(model_id, backend=None):
+    """Sequence-classification model for `backend` (defaults to config.INFERENCE_BACKEND).
+
+    Every backend takes the tokenizer's PyTorch tensors and returns an output
+    with `.logits`, so NLIModel runs them all the same way.
+    """
+    backend = backend or config.INFERENCE_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+
+    if backend == "onnx":
+        return _load_onnx(model_id)
+
+    from transformers import AutoModelForSequenceClassification  # type: ignore
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_id)
+    model.eval()
+    if backend == "pytorch-int8":
+        import torch  # type: ignore
+        from torch.ao.quantization import quantize_dynamic  # type: ignore
+
+        model = quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def _load_onnx(model_id):
+    """ONNX Runtime session, exported once and kept under config.MODELS_DIR"""
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification  # type: ignore
+    except ImportError as e:
+        raise ImportError("The onnx backend needs optimum[onnxruntime] (pip install optimum[onnxruntime])") from e
+
+    export_dir = config.MODELS_DIR / "onnx" / model_id.replace("/", "--")
+    if (export_dir / "model.onnx").exists():
+        return ORTModelForSequenceClassification.from_pretrained(export_dir)
+
+    logger.info("Exporting %s to ONNX (%s)...", model_id, export_dir)
+    model = ORTModelForSequenceClassification.from_pretrained(model_id, export=True)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    model.save_pretrained(export_dir)
+    return model
+
+
+def parity_check(texts, backend, reference="pytorch"):
+    """Compare top labels of `backend` against `reference` on a sample of texts.
+
+    Uses the label sets the analyzers register, so the check covers exactly
+    what detection asks the model. Returns per-label-set agreement plus the
+    average latency per message of each backend.
+    """
+    import model_registry
+    from product_detector import ProductDetector
+    from question_analyzer import QuestionAnalyzer
+
+    if backend == reference:
+        raise ValueError(f"Pick a backend other than the reference ({reference}) to compare against it")
+    # The detectors register their label sets on a model that never loads,
+    # so only the two models compared here take memory
+    label_source = model_registry.NLIModel(load_mode="lazy")
+    ProductDetector(ai_model=label_source)
+    QuestionAnalyzer(ai_model=label_source)
+    label_sets = dict(label_source.label_sets)
+
+    texts = [str(t) for t in texts]
+    report = {"backend": backend, "reference": reference, "messages": len(texts), "label_sets": {}}
+    predictions = {}
+    for name in (reference, backend):
+        # Compare the NLI model alone, without the fast tier in front
+        model = model_registry.NLIModel(backend=name, load_mode="eager", fast_tier_enabled=False)
+        for set_name, (labels, multi_label) in label_sets.items():
+            model.register_labels(set_name, labels, multi_label)
+        if not model.load():
+            raise RuntimeError(f"{name} backend failed to load: {model.load_error}")
+        started = time.perf_counter()
+        predictions[name] = {
+            set_name: [p["labels"][0] for p in model.classify_batch(texts, set_name)]
+            for set_name in label_sets
+        }
+        elapsed = time.perf_counter() - started
+        report[f"{name}_ms_per_message"] = round(1000 * elapsed / max(1, len(texts)), 2)
+
+    for set_name in label_sets:
+        expected = predictions[reference][set_name]
+        actual = predictions[backend][set_name]
+        mismatches = [
+            {"text": text, reference: want, backend: got}
+            for text, want, got in zip(texts, expected, actual)
+            if want != got
+        ]
+        report["label_sets"][set_name] = {
+            "agreement": round(1 - len(mismatches) / max(1, len(texts)), 4),
+            "mismatches": mismatches[:20],
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check an inference backend's labels against FP32 PyTorch")
+    parser.add_argument("--backend", choices=BACKENDS[1:], default="pytorch-int8",
+                        help="Backend to compare against FP32 PyTorch")
+    parser.add_argument("--input", default=str(config.DATA_FILE), help="Export to sample messages from")
+    parser.add_argument("--limit", type=int, default=200, help="Number of messages to compare")
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    import ingest
+
+    texts = []
+    for chunk in ingest.iter_chunks(args.input):
+        texts.extend(str(m).strip() for m in chunk["message"] if pd.notna(m) and str(m).strip())
+        if len(texts) >= args.limit:
+            break
+    texts = texts[: args.limit]
+
+    report = parity_check(texts, args.backend)
+    print(f"\n📏 Parity: {report['backend']} vs {report['reference']} on {report['messages']} messages")
+    print(f"   ⏱️  {report['reference']}: {report[report['reference'] + '_ms_per_message']} ms/message")
+    print(f"   ⏱️  {report['backend']}: {report[report['backend'] + '_ms_per_message']} ms/message")
+    for set_name, result in report["label_sets"].items():
+        print(f"   {set_name}: {result['agreement']:.1%} top-label agreement")
+        for mismatch in result["mismatches"][:5]:
+            print(f"      ✗ {mismatch['text'][:50]!r}: {mismatch[report['reference']]} -> {mismatch[report['backend']]}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# ingest.py - streaming readers for conversation exports (xlsx / csv / jsonl)
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+
+FORMATS = {'.xlsx': 'xlsx', '.xlsm': 'xlsx', '.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+
+def detect_format(source, fmt=None):
+    if fmt:
+        return fmt
+    name = source if isinstance(source, (str, Path)) else getattr(source, 'name', '')
+    suffix = Path(str(name)).suffix.lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Unsupported file type '{suffix or name}' (expected .xlsx, .csv or .jsonl)")
+    return FORMATS[suffix]
+
+
+def validate_columns(columns):
+    """Raise ValueError if any of config.REQUIRED_COLUMNS is missing"""
+    missing = [c for c in config.REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+
+def read_header(source, fmt=None):
+    """Column names of an export without loading its rows"""
+    fmt = detect_format(source, fmt)
+    if fmt == 'xlsx':
+        import openpyxl
+
+        wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+        try:
+            first = next(wb.active.iter_rows(max_row=1, values_only=True), ())
+        finally:
+            wb.close()
+        return [str(c) for c in first if c is not None]
+    if fmt == 'csv':
+        columns = list(pd.read_csv(source, nrows=0).columns)
+    else:
+        columns = []
+        for line in _lines(source):
+            if line.strip():
+                columns = list(json.loads(line).keys())
+                break
+    _rewind(source)
+    return columns
+
+
+def iter_chunks(source, chunk_size=None, fmt=None):
+    """Yield DataFrame chunks of at most `chunk_size` rows.
+
+    The header is validated against config.REQUIRED_COLUMNS before any row
+    is read. Chunk indexes continue across chunks, so an index is the row's
+    position in the whole export.
+    """
+    fmt = detect_format(source, fmt)
+    chunk_size = chunk_size or config.INGEST_CHUNK_SIZE
+    validate_columns(read_header(source, fmt))
+
+    if fmt == 'xlsx':
+        chunks = _xlsx_chunks(source, chunk_size)
+    elif fmt == 'csv':
+        chunks = pd.read_csv(source, chunksize=chunk_size)
+    else:
+        chunks = _jsonl_chunks(source, chunk_size)
+
+    offset = 0
+    for chunk in chunks:
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+def read_frame(source, fmt=None):
+    """Whole export as one DataFrame, read through the streaming reader"""
+    chunks = list(iter_chunks(source, fmt=fmt))
+    if not chunks:
+        return pd.DataFrame(columns=read_header(source, fmt))
+    return pd.concat(chunks)
+
+
+def _xlsx_chunks(source, chunk_size):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, ())
+        width = len(header)
+        while width and header[width - 1] is None:
+            width -= 1
+        columns = [str(c) for c in header[:width]]
+
+        batch = []
+        for row in rows:
+            row = row[:width]
+            if all(v is None for v in row):
+                continue
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield _frame(pd.DataFrame(batch, columns=columns))
+                batch = []
+        if batch:
+            yield _frame(pd.DataFrame(batch, columns=columns))
+    finally:
+        wb.close()
+
+
+def _jsonl_chunks(source, chunk_size):
+    batch = []
+    for line in _lines(source):
+        if not line.strip():
+            continue
+        batch.append(json.loads(line))
+        if len(batch) >= chunk_size:
+            yield _frame(pd.DataFrame.from_records(batch))
+            batch = []
+    if batch:
+        yield _frame(pd.DataFrame.from_records(batch))
+
+
+def _frame(chunk):
+    """Empty cells as NaN, like pd.read_csv gives, so row IDs don't depend on the export format"""
+    return chunk.fillna(np.nan)
+
+
+def _lines(source):
+    if isinstance(source, (str, Path)):
+        with open(source, encoding='utf-8') as fh:
+            yield from fh
+        return
+    # Plain loop, not `yield from`: stopping early must not close the caller's stream
+    for line in source:
+        yield line.decode('utf-8') if isinstance(line, bytes) else line
+
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
@@ -0,0 +1,166 @@
+# instrumentation.py - stage timers, counters and an optional profiler hook
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import config
+
+# IG_PROFILE=cprofile or IG_PROFILE=pyinstrument profiles every @profiled entry point
+PROFILE_ENV = 'IG_PROFILE'
+METRICS_FILE = 'metrics.jsonl'
+
+
+class Metrics:
+    """Named timers and counters for one process.
+
+    Timers accumulate call count, total and max seconds; counters are plain
+    integers. snapshot() gives both as a dict, write_summary() appends it to
+    LOGS_DIR/metrics.jsonl as one JSON line per run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.timings = {}  # name -> [calls, total seconds, max seconds]
+            self.counters = {}
+            self.started = time.perf_counter()
+
+    @contextmanager
+    def timer(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            entry = self.timings.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'wall_seconds': round(time.perf_counter() - self.started, 4),
+                'timings': {
+                    name: {'calls': calls, 'seconds': round(total, 4), 'max_seconds': round(peak, 4)}
+                    for name, (calls, total, peak) in sorted(self.timings.items(), key=lambda x: -x[1][1])
+                },
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def write_summary(self, run, extra=None):
+        """Append this run's snapshot (plus `extra` fields) to LOGS_DIR/metrics.jsonl"""
+        record = {'run': run, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), **(extra or {}), **self.snapshot()}
+        config.LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        with open(config.LOGS_DIR / METRICS_FILE, 'a', encoding='utf-8') as fh:
+            fh.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        return record
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    return _metrics
+
+
+def timer(name):
+    """Context manager timing a block under `name`"""
+    return _metrics.timer(name)
+
+
+def count(name, n=1):
+    _metrics.count(name, n)
+
+
+def timed(name):
+    """Decorator timing every call of a function under `name`"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _metrics.timer(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def timed_iter(name, iterable):
+    """Yield from `iterable`, timing how long each item takes to produce"""
+    iterator = iter(iterable)
+    while True:
+        with _metrics.timer(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def run_rates(snapshot, messages):
+    """Headline numbers for a run: messages/sec, model time share, cache hit rate, report write time"""
+    wall = snapshot['wall_seconds'] or None
+    model_seconds = sum(
+        snapshot['timings'].get(name, {}).get('seconds', 0.0) for name in ('model.forward', 'model.wait')
+    )
+    hits = snapshot['counters'].get('cache.hits', 0)
+    lookups = hits + snapshot['counters'].get('cache.misses', 0)
+    return {
+        'messages_per_sec': round(messages / wall, 1) if wall else None,
+        'model_time_share': round(model_seconds / wall, 4) if wall else 0.0,
+        'cache_hit_rate': round(hits / lookups, 4) if lookups else None,
+        'report_write_seconds': round(sum(
+            timing['seconds'] for name, timing in snapshot['timings'].items() if name.startswith('reports.write')
+        ), 4),
+    }
+
+
+def profiled(name):
+    """Decorator that profiles the call when IG_PROFILE is set.
+
+    cProfile stats go to LOGS_DIR/profile_<name>_<time>.prof (open with
+    snakeviz or pstats); pyinstrument writes an HTML report next to it.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            mode = os.environ.get(PROFILE_ENV, '').strip().lower()
+            if not mode:
+                return fn(*args, **kwargs)
+            config.LOGS_DIR.mkdir(parents=True, exist_ok=True)
+            stem = config.LOGS_DIR / f"profile_{name}_{time.strftime('%Y%m%d-%H%M%S')}"
+
+            if mode == 'pyinstrument':
+                from pyinstrument import Profiler  # type: ignore
+
+                profiler = Profiler()
+                profiler.start()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    profiler.stop()
+                    stem.with_suffix('.html').write_text(profiler.output_html(), encoding='utf-8')
+                    print(f"🔬 Profile: {stem.with_suffix('.html')}")
+
+            import cProfile
+
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(fn, *args, **kwargs)
+            finally:
+                profiler.dump_stats(stem.with_suffix('.prof'))
+                print(f"🔬 Profile: {stem.with_suffix('.prof')}")
+        return wrapper
+    return decorate
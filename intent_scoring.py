@@ -0,0 +1,97 @@
+# intent_scoring.py - one intent scoring engine shared by the CLI and the web app
+import numpy as np
+import pandas as pd
+
+import config
+
+# Score components (score starts at BASE_SCORE and is capped at 1.0)
+BASE_SCORE = 0.3
+URGENT_QUESTION_WEIGHT = 0.15
+READY_TO_BUY_BONUS = 0.3
+TIMEFRAME_BONUS = {'Today': 0.25, 'Tomorrow': 0.25}
+OTHER_TIMEFRAME_BONUS = 0.10  # any other specified timeframe
+HISTORY_WEIGHT = 0.05
+HISTORY_CAP = 0.15
+URGENCY_WEIGHT = 0.02
+URGENCY_CAP = 0.2
+
+INTENT_LABELS = {'very_high': 'Very High', 'high': 'High', 'medium': 'Medium', 'low': 'Low'}
+
+# (history band, [very high intent, high intent, anything lower])
+SEGMENTS = [
+    ('new', ["🔥 Hot Lead", "✨ Warm Lead", "📋 New Prospect"]),
+    ('follow_up', ["🎯 Engaged Buyer", "💬 Interested", "📊 Browsing"]),
+    ('returning', ["👑 VIP Customer", "🤝 Regular Customer", "💼 Returning"]),
+]
+
+
+def score_signals(urgent_questions, ready_to_buy, timeframe, history_count, urgency_modifier):
+    """Intent score (0.0 - 1.0) for each message from columnar signal arrays"""
+    urgent_questions = np.asarray(urgent_questions, dtype=float)
+    ready_to_buy = np.asarray(ready_to_buy, dtype=bool)
+    timeframe = pd.Series(timeframe, dtype=object)
+    history_count = np.asarray(history_count, dtype=float)
+    urgency_modifier = np.asarray(urgency_modifier, dtype=float)
+
+    timeframe_bonus = timeframe.map(TIMEFRAME_BONUS).to_numpy(dtype=float, na_value=np.nan)
+    timeframe_bonus = np.where(
+        np.isnan(timeframe_bonus),
+        np.where((timeframe != "Not specified").to_numpy(), OTHER_TIMEFRAME_BONUS, 0.0),
+        timeframe_bonus,
+    )
+
+    score = (
+        BASE_SCORE
+        + urgent_questions * URGENT_QUESTION_WEIGHT
+        + ready_to_buy * READY_TO_BUY_BONUS
+        + timeframe_bonus
+        + np.minimum(history_count * HISTORY_WEIGHT, HISTORY_CAP)
+        + np.minimum(urgency_modifier * URGENCY_WEIGHT, URGENCY_CAP)
+    )
+    # Round away float noise so e.g. 0.3 + 0.3 + 0.2 lands exactly on the 0.8 cutoff
+    return np.round(np.minimum(score, 1.0), 6)
+
+
+def _band_index(scores):
+    """0 = very high, 1 = high, 2 = medium, 3 = low (cutoffs from config.INTENT_THRESHOLDS)"""
+    scores = np.asarray(scores, dtype=float)
+    t = config.INTENT_THRESHOLDS
+    return np.select(
+        [scores >= t['very_high'], scores >= t['high'], scores >= t['medium']],
+        [0, 1, 2],
+        default=3,
+    )
+
+
+def intent_levels(scores):
+    labels = np.array([INTENT_LABELS[k] for k in ('very_high', 'high', 'medium', 'low')], dtype=object)
+    return labels[_band_index(scores)]
+
+
+def segment_customers(history_count, scores):
+    """Customer segment from conversation history and intent score"""
+    history_count = np.asarray(history_count)
+    history_band = np.select([history_count == 0, history_count <= 2], [0, 1], default=2)
+    intent_band = np.minimum(_band_index(scores), 2)
+    table = np.array([labels for _, labels in SEGMENTS], dtype=object)
+    return table[history_band, intent_band]
+
+
+def conversation_stages(history_count):
+    history_count = np.asarray(history_count)
+    return np.select(
+        [history_count == 0, history_count <= 2],
+        ["Initial Contact", "Follow-up"],
+        default="Active Discussion",
+    ).astype(object)
+
+
+def score_batch(urgent_questions, ready_to_buy, timeframe, history_count, urgency_modifier):
+    """Score, intent level, segment and conversation stage for a whole batch"""
+    scores = score_signals(urgent_questions, ready_to_buy, timeframe, history_count, urgency_modifier)
+    return pd.DataFrame({
+        'score': scores,
+        'intent': intent_levels(scores),
+        'customer_segment': segment_customers(history_count, scores),
+        'stage': conversation_stages(history_count),
+    })
@@ -0,0 +1,84 @@
+# keyword_matcher.py - Aho-Corasick automaton for scanning many keywords at once
+from collections import deque
+
+
+def is_word_char(ch):
+    """Same notion of a word character as the `\\w` class in `re`"""
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordMatcher:
+    """Find every occurrence of every keyword in a single pass over the text.
+
+    Built once from (keyword, payload) pairs; matching cost depends on the text
+    length and the number of hits, not on how many keywords were compiled in.
+    Overlapping and nested keywords are all reported, like running one
+    `in` / `re.search` check per keyword would.
+    """
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for keyword, payload in keywords:
+            self._add(keyword, payload)
+        self._link()
+
+    def _add(self, keyword, payload):
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(keyword), payload))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter_matches(self, text):
+        """Yield (start, end, payload) for every keyword occurrence"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, payload in out[node]:
+                yield i + 1 - length, i + 1, payload
+
+    def find(self, text, whole_words=False):
+        """Set of payloads whose keyword occurs in `text`.
+
+        With whole_words=True a hit only counts when it sits between `\\b`
+        word boundaries, matching `re.search(r"\\b" + re.escape(kw) + r"\\b")`.
+        """
+        found = set()
+        for start, end, payload in self.iter_matches(text):
+            if payload in found:
+                continue
+            if whole_words and not (
+                _is_boundary(text, start) and _is_boundary(text, end)
+            ):
+                continue
+            found.add(payload)
+        return found
+
+
+def _is_boundary(text, pos):
+    before = pos > 0 and is_word_char(text[pos - 1])
+    after = pos < len(text) and is_word_char(text[pos])
+    return before != after
@@ -0,0 +1,64 @@
+# logging_config.py - rotating JSON log files in LOGS_DIR for every module
+import json
+import logging
+import logging.handlers
+import time
+
+import config
+
+LOGGER_NAME = 'ig_tracker'
+LOG_FILE = 'analyzer.log'
+
+_configured = False
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any `fields` passed via extra"""
+
+    def format(self, record):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def get_logger(name):
+    """Logger under the ig_tracker hierarchy (e.g. get_logger('product_detector'))"""
+    return logging.getLogger(f'{LOGGER_NAME}.{name}')
+
+
+def setup_logging(level=None, console_level=logging.INFO):
+    """Attach the rotating JSON file handler (and a plain console handler) once per process"""
+    global _configured
+    if _configured:
+        return logging.getLogger(LOGGER_NAME)
+
+    config.LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level or config.LOG_LEVEL)
+    logger.propagate = False
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        config.LOGS_DIR / LOG_FILE,
+        maxBytes=config.LOG_MAX_BYTES,
+        backupCount=config.LOG_BACKUP_COUNT,
+        encoding='utf-8',
+    )
+    file_handler.setFormatter(JSONFormatter())
+    logger.addHandler(file_handler)
+
+    console = logging.StreamHandler()
+    console.setLevel(console_level)
+    console.setFormatter(logging.Formatter('[%(levelname)s] %(message)s'))
+    logger.addHandler(console)
+
+    _configured = True
+    return logger
@@ -0,0 +1,291 @@
+# model_registry.py - one shared zero-shot (NLI) model for every analyzer
+import threading
+from collections import OrderedDict
+
+import config
+import fast_classifier
+import inference_backends
+import instrumentation
+from batching import iter_length_buckets
+from logging_config import get_logger
+
+logger = get_logger("model_registry")
+
+
+class NLIModel:
+    """Zero-shot classifier shared by ProductDetector and QuestionAnalyzer.
+
+    Analyzers register their label sets once. Every classification request then
+    scores the text against *all* registered label sets in the same forward pass,
+    so the product and question lookups for one message cost a single model call.
+    Hypothesis token ids are built once per label and reused for every message.
+    A trained fast tier loads on its own (when the first label set registers)
+    and answers confident texts first, even while the NLI model loads, is off
+    or failed; the NLI model is only loaded and called for the rest.
+    """
+
+    def __init__(self, model_id=None, hypothesis_template=None, backend=None, load_mode=None, fast_tier_enabled=None):
+        self.model_id = model_id or config.NLI_MODEL_ID
+        self.backend = backend or config.INFERENCE_BACKEND
+        self._load_mode = load_mode  # None: follow config.AI_LOAD_MODE
+        self._fast_tier_enabled = fast_tier_enabled  # None: follow config.FAST_TIER_ENABLED
+        self.hypothesis_template = hypothesis_template or config.NLI_HYPOTHESIS_TEMPLATE
+        self.label_sets = OrderedDict()  # name -> (labels, multi_label)
+        self.tokenizer = None
+        self.model = None
+        self.fast_tier = None  # fast_classifier.FastTier answering confident texts first
+        self.fast_hits = 0
+        self.fast_checked = 0  # texts the fast tier was asked about
+        self.model_texts = 0
+        self._fast_tier_checked = False
+        self.loaded = False  # Track if we've tried to load
+        self.available = False
+        self.status = "not loaded"  # not loaded -> loading -> ready / failed (or disabled)
+        self.load_error = None
+        self._entail_id = None
+        self._contra_id = None
+        self._hypothesis_ids = {}  # label -> tokenized hypothesis (no special tokens)
+        self._results = OrderedDict()  # text -> {label set name: prediction}
+        self._lock = threading.RLock()  # guards label sets, caches and inference
+        self._load_lock = threading.Lock()  # held for the whole (slow) load
+        self._loader = None
+        self._done = threading.Event()
+
+    def register_labels(self, name, labels, multi_label=False):
+        """Register (or replace) a named label set scored on every request"""
+        with self._lock:
+            labels = list(labels)
+            if self.label_sets.get(name) == (labels, multi_label):
+                return
+            self.label_sets[name] = (labels, multi_label)
+            self._results.clear()
+            if self.available:
+                self._encode_hypotheses(labels)
+            self.load_fast_tier()
+
+    def load_fast_tier(self):
+        """Load the trained fast tier once (if enabled); it doesn't wait for the NLI model"""
+        with self._lock:
+            if not self._fast_tier_checked:
+                self._fast_tier_checked = True
+                if self.fast_tier_enabled:
+                    self.fast_tier = fast_classifier.load_fast_tier()
+            return self.fast_tier
+
+    def fast_tier_ready(self):
+        """True if the fast tier is loaded and trained for the registered label sets"""
+        return self.fast_tier is not None and self.fast_tier.covers(self.label_sets)
+
+    def can_classify(self):
+        """True if the NLI model or the fast tier can answer now (starts the model loading otherwise)"""
+        if self.available or self.fast_tier_ready():
+            return True
+        self.ensure_loading()
+        return self.available
+
+    def is_ready(self):
+        return self.available
+
+    @property
+    def load_mode(self):
+        return self._load_mode or config.AI_LOAD_MODE
+
+    @property
+    def fast_tier_enabled(self):
+        return config.FAST_TIER_ENABLED if self._fast_tier_enabled is None else self._fast_tier_enabled
+
+    @property
+    def cache_id(self):
+        """Identifies what answers predictions right now (model + backend, fast tier) for result caches"""
+        parts = []
+        if self.available:
+            parts.append(self.model_id if self.backend == "pytorch" else f"{self.model_id}@{self.backend}")
+        if self.fast_tier_ready():
+            parts.append(f"fast-{self.fast_tier.version}")
+        return "+".join(parts) or "rules-only"
+
+    def ensure_loading(self):
+        """Kick off loading according to load_mode (blocks only in 'eager')"""
+        if self.load_mode == "eager":
+            self.load()
+        else:
+            self.start_loading()
+
+    def start_loading(self):
+        """Load in a daemon thread; callers keep using rules until is_ready()"""
+        if self.load_mode == "off":
+            self.load()
+            return
+        with self._lock:
+            if self.loaded or self._loader is not None:
+                return
+            self.status = "loading"
+            self._loader = threading.Thread(target=self.load, name="nli-model-loader", daemon=True)
+            self._loader.start()
+
+    def wait_until_ready(self, timeout=None):
+        """Block until loading finished (starting it if needed); returns availability"""
+        if self._loader is None and not self.loaded:
+            return self.load()
+        self._done.wait(timeout)
+        return self.available
+
+    def load(self):
+        """Load tokenizer + model once; later calls are no-ops"""
+        with self._load_lock:
+            if self.loaded:
+                return self.available
+            if self.load_mode == "off":
+                self.status = "disabled"
+                self.loaded = True
+                self._done.set()
+                return False
+            self.status = "loading"
+            try:
+                from transformers import AutoTokenizer  # type: ignore
+
+                logger.info("Loading shared AI model (%s, %s backend)...", self.model_id, self.backend)
+                tokenizer = AutoTokenizer.from_pretrained(self.model_id)
+                model = inference_backends.load_model(self.model_id, self.backend)
+
+                label2id = {k.lower(): v for k, v in model.config.label2id.items()}
+                with self._lock:
+                    self._entail_id = next(v for k, v in label2id.items() if k.startswith("entail"))
+                    self._contra_id = next(v for k, v in label2id.items() if k.startswith("contra"))
+                    self.tokenizer = tokenizer
+                    self.model = model
+                    for labels, _ in self.label_sets.values():
+                        self._encode_hypotheses(labels)
+                    self.available = True
+                self.status = "ready"
+                logger.info("Shared AI model loaded")
+            except Exception as e:
+                logger.warning("Shared AI model failed to load: %s", e)
+                self.load_error = str(e)
+                self.available = False
+                self.status = "failed"
+                self.tokenizer = None
+                self.model = None
+            finally:
+                self.loaded = True
+                self._done.set()
+            return self.available
+
+    def _encode_hypotheses(self, labels):
+        backend = self.tokenizer.backend_tokenizer
+        for label in labels:
+            if label not in self._hypothesis_ids:
+                hypothesis = self.hypothesis_template.format(label)
+                self._hypothesis_ids[label] = backend.encode(hypothesis, add_special_tokens=False)
+
+    def classify(self, text, name):
+        """Pipeline-style prediction ({'labels', 'scores'}) for one text, or None (see classify_batch)"""
+        return self.classify_batch([text], name)[0]
+
+    def classify_batch(self, texts, name):
+        """Predictions for label set `name`, one per text, in input order.
+
+        The fast tier answers the texts it is sure about. The NLI model is
+        loaded (per load_mode) and run only for the rest; while it is loading,
+        off or failed those texts come back as None and the rules handle them.
+        """
+        texts = [str(t)[: config.AI_MAX_CHARS] for t in texts]
+        with self._lock:
+            fast_ready = self.fast_tier_ready()
+            if not self.available and not fast_ready:
+                raise RuntimeError("AI model is not available")
+            pending = list(OrderedDict.fromkeys(t for t in texts if t not in self._results))
+            if pending and fast_ready:
+                fast = self.fast_tier.predict(pending)
+                for text, predictions in zip(pending, fast):
+                    if predictions is not None:
+                        self._remember(text, {n: predictions[n] for n in self.label_sets})
+                self.fast_checked += len(pending)
+                pending = [text for text, predictions in zip(pending, fast) if predictions is None]
+                self.fast_hits += len(fast) - len(pending)
+                instrumentation.count("model.fast_tier_hits", len(fast) - len(pending))
+            if pending and not self.available:
+                self.ensure_loading()  # only blocks in 'eager'
+            if pending and self.available:
+                self.model_texts += len(pending)
+                instrumentation.count("model.texts", len(pending))
+                for bucket in iter_length_buckets(pending, config.AI_BATCH_SIZE):
+                    batch = [pending[i] for i in bucket]
+                    for text, predictions in zip(batch, self._forward(batch)):
+                        self._remember(text, predictions)
+            return [self._results[t][name] if t in self._results else None for t in texts]
+
+    def _remember(self, text, predictions):
+        self._results[text] = predictions
+        self._results.move_to_end(text)
+        while len(self._results) > config.NLI_RESULT_CACHE_SIZE:
+            self._results.popitem(last=False)
+
+    @instrumentation.timed("model.forward")
+    def _forward(self, texts):
+        """Score every (text, label) pair of every label set in one model call"""
+        import torch  # type: ignore
+
+        pairs = [(name, label) for name, (labels, _) in self.label_sets.items() for label in labels]
+        backend = self.tokenizer.backend_tokenizer
+        max_len = min(self.tokenizer.model_max_length, 512)
+        room = max_len - self.tokenizer.num_special_tokens_to_add(pair=True)
+        room -= max(len(self._hypothesis_ids[label]) for _, label in pairs)
+        with_types = "token_type_ids" in self.tokenizer.model_input_names
+
+        sequences = []
+        for text in texts:
+            premise = backend.encode(text, add_special_tokens=False)
+            premise.truncate(max(1, room))
+            for _, label in pairs:
+                encoding = backend.post_process(premise, self._hypothesis_ids[label], add_special_tokens=True)
+                features = {"input_ids": encoding.ids}
+                if with_types:
+                    features["token_type_ids"] = encoding.type_ids
+                sequences.append(features)
+
+        inputs = self.tokenizer.pad(sequences, return_tensors="pt")
+        # Per call, not at load time: grad mode is thread-local and callers run on their own threads
+        with torch.inference_mode():
+            logits = self.model(**inputs).logits.reshape(len(texts), len(pairs), -1)
+
+        results = []
+        for row in logits:
+            predictions = {}
+            offset = 0
+            for name, (labels, multi_label) in self.label_sets.items():
+                block = row[offset: offset + len(labels)]
+                offset += len(labels)
+                if multi_label:
+                    pair_logits = block[:, [self._contra_id, self._entail_id]]
+                    scores = torch.softmax(pair_logits, dim=-1)[:, 1]
+                else:
+                    scores = torch.softmax(block[:, self._entail_id], dim=-1)
+                ranked = sorted(zip(labels, scores.tolist()), key=lambda x: x[1], reverse=True)
+                predictions[name] = {
+                    "labels": [label for label, _ in ranked],
+                    "scores": [score for _, score in ranked],
+                }
+            results.append(predictions)
+        return results
+
+
+_shared_model = None
+_shared_lock = threading.Lock()
+
+
+def get_model():
+    """Return the process-wide NLIModel (created on first use, not loaded)"""
+    global _shared_model
+    with _shared_lock:
+        if _shared_model is None:
+            _shared_model = NLIModel()
+        return _shared_model
+
+
+def warm_up():
+    """Load the shared model now and run one dummy request through it"""
+    model = get_model()
+    if model.wait_until_ready() and model.label_sets:
+        model.classify("warm up", next(iter(model.label_sets)))
+    return model.available
@@ -0,0 +1,84 @@
+# parallel_analysis.py - shard message detection across a process pool
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+
+# Set in each worker process by _init_worker
+_detectors = None
+
+
+def _init_worker(settings, torch_threads):
+    """Build the detectors (and load the model, if enabled) once per worker"""
+    global _detectors
+    # Workers may be spawned rather than forked, so carry over the parent's config
+    for name, value in settings.items():
+        setattr(config, name, value)
+    if config.AI_LOAD_MODE != "off":
+        config.AI_LOAD_MODE = "eager"
+        try:
+            import torch
+
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+
+    from product_detector import ProductDetector
+    from question_analyzer import QuestionAnalyzer
+
+    _detectors = (ProductDetector(), QuestionAnalyzer())
+
+
+def _detect_shard(texts, post_products):
+    import analysis_pipeline
+
+    return analysis_pipeline.detect_signals(*_detectors, texts, post_products)
+
+
+class AnalysisPool:
+    """Process pool that runs product/question detection on shards of a batch.
+
+    Every worker loads the rule engine (and the AI model unless AI_LOAD_MODE is
+    "off") once when it starts, then serves shards until close(). Scoring and
+    history stay in the parent; shards come back in input order.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        settings = {k: v for k, v in vars(config).items() if k.isupper()}
+        torch_threads = max(1, (os.cpu_count() or 1) // workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(settings, torch_threads),
+        )
+
+    def detect(self, texts, post_products):
+        """(products, questions, signals) for every text, same shape as detect_signals"""
+        if not texts:
+            return [], [], []
+        # A few shards per worker so one slow shard doesn't leave the others idle
+        size = max(1, math.ceil(len(texts) / (self.workers * 4)))
+        starts = range(0, len(texts), size)
+        shards = self._executor.map(
+            _detect_shard,
+            [texts[i:i + size] for i in starts],
+            [post_products[i:i + size] for i in starts],
+        )
+
+        products, questions, signals = [], [], []
+        for shard_products, shard_questions, shard_signals in shards:
+            products.extend(shard_products)
+            questions.extend(shard_questions)
+            signals.extend(shard_signals)
+        return products, questions, signals
+
+    def close(self):
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
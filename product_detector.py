@@ -1,12 +1,23 @@
 # product_detector.py
+import hashlib
+import json
 import re
 
+import config
+import instrumentation
+import model_registry
+from keyword_matcher import KeywordMatcher
+from logging_config import get_logger
+
+logger = get_logger("product_detector")
+
 
 class ProductDetector:
-    def __init__(self):
+    def __init__(self, ai_model=None):
         self.use_ai = False
-        self.ai_model = None
-        self.ai_loaded = False  # Track if we've tried to load AI
+        self.ai_model = ai_model  # None: the process-wide model from model_registry
+        self.ai_loaded = False  # Track if we've attached the shared AI model
+        self.cascade_counts = {"skipped": 0, "sent_to_ai": 0}  # config.CASCADE_MODE decisions
         self.product_categories = [
             "iPhone",
             "iPad",
@@ -297,37 +308,84 @@ class ProductDetector:
             },
         }
 
-        # Try to load AI model on initialization (PRIMARY detection method)
+        # Fingerprint of the rule tables (part of the analysis cache key)
+        self.rules_version = hashlib.sha1(
+            json.dumps(self.products, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:12]
+
+        # Compile every model alias into one automaton (catalog order is kept for results)
+        self._catalog = [
+            (category, model_name)
+            for category, models in self.products.items()
+            for model_name in models
+        ]
+        self._alias_matcher = KeywordMatcher(
+            (pattern.lower(), index)
+            for index, (category, model_name) in enumerate(self._catalog)
+            for pattern in self.products[category][model_name]
+        )
+        # Aliases that name a product on their own (not bare numbers like "15"); cascade mode trusts these
+        self._strong_alias_matcher = KeywordMatcher(
+            (pattern.lower(), index)
+            for index, (category, model_name) in enumerate(self._catalog)
+            for pattern in self.products[category][model_name]
+            if _is_strong_alias(pattern)
+        )
+
+        # Attach the shared AI model (PRIMARY detection method); it loads per its load_mode
         self._load_ai_model()
 
     def _load_ai_model(self):
-        """Load AI model for PRIMARY product detection (zero-shot classification)"""
+        """Attach the shared zero-shot model for PRIMARY product detection"""
         if self.ai_loaded:
-            return  # Already attempted to load
+            return  # Already attached
 
         self.ai_loaded = True
-        try:
-            from transformers import pipeline  # type: ignore
-
-            print("[INFO] Loading AI product detection model (PRIMARY method)...")
-            # Use XLM-RoBERTa XNLI checkpoint for multilingual zero-shot classification
-            # Common HF ID: 'joeddav/xlm-roberta-large-xnli'
-            self.ai_model = pipeline(
-                "zero-shot-classification",
-                model="joeddav/xlm-roberta-large-xnli",
-                device=-1,  # Use CPU
-            )
-            self.use_ai = True
-            print("[SUCCESS] AI model loaded! Using AI-FIRST detection.\n")
-        except Exception as e:
-            print(
-                f"[WARNING] AI model failed to load: {e}\n[INFO] Falling back to rule-based detection\n"
-            )
-            self.use_ai = False
-            self.ai_model = None
+        self.ai_model = self.ai_model or model_registry.get_model()
+        self.ai_model.register_labels("products", self.product_categories, multi_label=False)
+        if self.ai_model.load_mode != "lazy":
+            self.ai_model.ensure_loading()
+
+    def _ai_available(self):
+        """True once the fast tier or the shared model can answer; until then rules serve requests"""
+        if not self.ai_loaded:
+            self._load_ai_model()
+        self.use_ai = self.ai_model.can_classify()
+        return self.use_ai
 
     def detect_products(self, text, post_product=""):
         """PRIMARY: AI detection. SECONDARY: Rule-based fallback."""
+        ai_products = self._detect_with_ai(text) if self._needs_ai(text, post_product) else []
+        return self._combine_detections(text, post_product, ai_products)
+
+    def detect_products_batch(self, texts, post_products=None):
+        """Batch version of detect_products (AI runs in length-bucketed mini-batches)"""
+        texts = [str(t) for t in texts]
+        if post_products is None:
+            post_products = [""] * len(texts)
+
+        ai_results = [[] for _ in texts]
+        ai_rows = [i for i, (text, post_product) in enumerate(zip(texts, post_products)) if self._needs_ai(text, post_product)]
+        if ai_rows:
+            for i, ai_products in zip(ai_rows, self._detect_with_ai_batch([texts[i] for i in ai_rows])):
+                ai_results[i] = ai_products
+        return [
+            self._combine_detections(text, post_product, ai_products)
+            for text, post_product, ai_products in zip(texts, post_products, ai_results)
+        ]
+
+    def _needs_ai(self, text, post_product):
+        """In cascade mode, skip the model when post context or a strong alias already names the product"""
+        if not config.CASCADE_MODE:
+            return True
+        if (post_product and post_product.strip()) or self._strong_alias_matcher.find(text.lower(), whole_words=True):
+            self.cascade_counts["skipped"] += 1
+            return False
+        self.cascade_counts["sent_to_ai"] += 1
+        return True
+
+    def _combine_detections(self, text, post_product, ai_products):
+        """Merge post context, AI results and the rule-based fallback"""
         detected = []
 
         # Add post product context
@@ -343,8 +401,7 @@ class ProductDetector:
 
         text_lower = text.lower()
 
-        # PRIMARY: Try AI detection first
-        ai_products = self._detect_with_ai(text)
+        # PRIMARY: AI results
         if ai_products:
             # AI found products - use AI results
             detected.extend(ai_products)
@@ -372,82 +429,89 @@ class ProductDetector:
 
     def _detect_with_ai(self, text):
         """PRIMARY detection method using AI and transformers"""
-        # Ensure AI is loaded
-        if not self.ai_loaded:
-            self._load_ai_model()
-
         # Use AI if available
-        if self.use_ai and self.ai_model:
+        if self._ai_available():
             try:
                 return self._detect_products_ai(text)
             except Exception as e:
-                print(f"  [WARNING] AI detection error: {e}")
+                logger.warning("AI detection error: %s", e)
                 return []
         return []
 
+    @instrumentation.timed("product.ai_batch")
+    def _detect_with_ai_batch(self, texts):
+        """Run the zero-shot model over many texts; one result list per text"""
+        results = [[] for _ in texts]
+        if not self._ai_available():
+            return results
+
+        try:
+            predictions = self.ai_model.classify_batch(texts, "products")
+        except Exception as e:
+            logger.warning("AI batch detection error: %s", e)
+            return results
+        return [self._products_from_prediction(p) for p in predictions]
+
+    @instrumentation.timed("product.rules")
     def _detect_with_rules(self, text_lower, text):
         """SECONDARY detection method using rule-based patterns"""
         detected = []
-        for category, models in self.products.items():
-            for model_name, patterns in models.items():
-                for pattern in patterns:
-                    if self._match(pattern, text_lower):
-                        storage = self._extract_storage(text)
-                        prod_name = model_name.title()
-                        if storage:
-                            prod_name += f" {storage}"
-
-                        if not self._is_duplicate(prod_name, detected):
-                            detected.append(
-                                {
-                                    "product": prod_name,
-                                    "category": category,
-                                    "confidence": "high",
-                                    "source": "rules",
-                                }
-                            )
-                        break
+        matched = self._alias_matcher.find(text_lower, whole_words=True)
+        if not matched:
+            return detected
+
+        storage = self._extract_storage(text)
+        for index in sorted(matched):
+            category, model_name = self._catalog[index]
+            prod_name = model_name.title()
+            if storage:
+                prod_name += f" {storage}"
+
+            if not self._is_duplicate(prod_name, detected):
+                detected.append(
+                    {
+                        "product": prod_name,
+                        "category": category,
+                        "confidence": "high",
+                        "source": "rules",
+                    }
+                )
         return detected
 
     def _detect_products_ai(self, text):
         """Detect products using zero-shot classification (AI-powered)"""
         try:
-            results = []
-            text_short = text[:300]  # Limit text length
+            text_short = text[: config.AI_MAX_CHARS]  # Limit text length
 
             # Use zero-shot classification to find product mentions
-            # The pipeline returns a dict with 'labels' and 'scores'
+            # The shared model returns a dict with 'labels' and 'scores'
             if not self.ai_model:
                 return []
-            predictions = self.ai_model(
-                text_short, self.product_categories, multi_class=False
-            )
-            labels = (
-                predictions.get("labels", []) if isinstance(predictions, dict) else []
-            )
-            scores = (
-                predictions.get("scores", []) if isinstance(predictions, dict) else []
-            )
-
-            if labels and scores:
-                top_label = labels[0]
-                top_score = scores[0]
-                if top_score > 0.5:  # Only if confident
-                    results.append(
-                        {
-                            "product": top_label,
-                            "category": top_label,
-                            "confidence": "medium" if top_score > 0.7 else "low",
-                            "source": "ai",
-                        }
-                    )
-
-            return results
+            predictions = self.ai_model.classify(text_short, "products")
+            return self._products_from_prediction(predictions)
         except Exception:
             return []
 
-    def _match(self, pattern, text):
-        return bool(re.search(r"\b" + re.escape(pattern) + r"\b", text, re.IGNORECASE))
+    def _products_from_prediction(self, predictions):
+        """Turn one zero-shot prediction into product detections"""
+        results = []
+        labels = predictions.get("labels", []) if isinstance(predictions, dict) else []
+        scores = predictions.get("scores", []) if isinstance(predictions, dict) else []
+
+        if labels and scores:
+            top_label = labels[0]
+            top_score = scores[0]
+            if top_score > 0.5:  # Only if confident
+                results.append(
+                    {
+                        "product": top_label,
+                        "category": top_label,
+                        "confidence": "medium" if top_score > 0.7 else "low",
+                        "source": "ai",
+                    }
+                )
+
+        return results
 
     def _extract_storage(self, text):
         """Extract storage capacity with enhanced pattern matching"""
@@ -514,3 +578,8 @@ class ProductDetector:
             if p["product"] not in unique:
                 unique.append(p["product"])
         return ", ".join(unique)
+
+
+def _is_strong_alias(alias):
+    """True for aliases like "s24" or "ps5"; bare numbers ("15") and two-character codes are too ambiguous"""
+    return len(alias) >= 3 and any(ch.isalpha() for ch in alias)
@@ -1,9 +1,21 @@
 # question_analyzer.py
+import hashlib
+import json
+
+import config
+import instrumentation
+import intent_scoring
+import model_registry
+from keyword_matcher import KeywordMatcher
+from logging_config import get_logger
+
+logger = get_logger('question_analyzer')
 
 class QuestionAnalyzer:
-    def __init__(self):
+    def __init__(self, ai_model=None):
         self.use_ai = False
-        self.ai_model = None
+        self.cascade_counts = {'skipped': 0, 'sent_to_ai': 0}  # config.CASCADE_MODE decisions
+        self.ai_model = ai_model  # None: the process-wide model from model_registry
         self.question_types = ['Price', 'Availability', 'Payment Methods', 'Warranty', 'Delivery', 'Colors', 'Specs']
         
         self.patterns = {
@@ -152,50 +164,113 @@ class QuestionAnalyzer:
             },
         }
         
-        # Try to load free AI model (optional enhancement)
+        # Purchase signals (English + Sinhala)
+        self.ready_keywords = [
+            'i will come', 'coming', 'will buy', 'want to buy',
+            'today', 'tomorrow', 'keep one', 'reserve',
+            'එනවා', 'ගන්නම්', 'අද', 'හෙට', 'ennada', 'gemak'
+        ]
+        
+        self.timeframes = {
+            'Today': ['today', 'අද', 'right now', 'now', 'asap', 'today itself'],
+            'Tomorrow': ['tomorrow', 'හෙට', 'tmrw', 'tmr'],
+            'This Weekend': ['weekend', 'saturday', 'sunday'],
+            'Next Week': ['next week', 'ලබන සතියේ'],
+            'This Month': ['this month', 'මේ මාසේ'],
+        }
+        
+        self.urgent_words = {
+            'extreme': ['asap', 'urgent', 'emergency', 'immediately', 'right now', 'hurry'],
+            'high': ['today', 'now', 'soon', 'quick', 'fast'],
+            'medium': ['tomorrow', 'this week', 'this weekend'],
+            'low': ['eventually', 'whenever', 'no rush']
+        }
+        self.urgency_points = {'extreme': 10, 'high': 7, 'medium': 4, 'low': 1}
+        
+        # Fingerprint of the rule tables (part of the analysis cache key)
+        tables = [self.question_types, self.patterns, self.ready_keywords, self.timeframes, self.urgent_words]
+        self.rules_version = hashlib.sha1(json.dumps(tables, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        
+        # One scanner over every keyword table; each hit is tagged with what it signals
+        keywords = []
+        for q_type, data in self.patterns.items():
+            keywords += [(kw, ('question', q_type)) for kw in data['keywords']]
+        keywords += [(kw, ('ready', None)) for kw in self.ready_keywords]
+        for tf, words in self.timeframes.items():
+            keywords += [(kw, ('timeframe', tf)) for kw in words]
+        for level, words in self.urgent_words.items():
+            keywords += [(kw, ('urgency', level)) for kw in words]
+        self._scanner = KeywordMatcher(keywords)
+        self._last_scan = (None, None)
+        
+        # Attach the shared AI model (optional enhancement); it loads per its load_mode
         self._load_ai_model()
     
     def _load_ai_model(self):
-        """Load free zero-shot classification model for question intent detection"""
-        try:
-            from transformers import pipeline
-            print("[INFO] Loading free AI question detection model (zero-shot)...")
-            self.ai_model = pipeline(
-                "zero-shot-classification",
-                model="facebook/bart-large-mnli",
-                device=-1  # Use CPU
-            )
-            self.use_ai = True
-            print("[SUCCESS] AI question detection model loaded!\n")
-        except Exception as e:
-            print(f"[WARNING] AI question model unavailable (using rule-based only): {e}\n")
-            self.use_ai = False
-            self.ai_model = None
+        """Attach the shared zero-shot model for question intent detection"""
+        self.ai_model = self.ai_model or model_registry.get_model()
+        self.ai_model.register_labels('questions', self.question_types, multi_label=True)
+        if self.ai_model.load_mode != 'lazy':
+            self.ai_model.ensure_loading()
+    
+    def _ai_available(self):
+        """True once the fast tier or the shared model can answer; until then keywords serve requests"""
+        self.use_ai = self.ai_model.can_classify()
+        return self.use_ai
     
     def analyze_questions(self, text):
-        text_lower = text.lower()
-        detected = []
+        ai_questions = []
         
         # Try AI model first (if available)
-        if self.use_ai and self.ai_model:
+        if self._needs_ai(text) and self._ai_available():
             try:
                 ai_questions = self._analyze_questions_ai(text)
-                detected.extend(ai_questions)
             except Exception as e:
-                print(f"  [WARNING] AI question detection failed: {e}, using keywords")
-                pass
+                logger.warning("AI question detection failed: %s, using keywords", e)
+        
+        return self._merge_with_keywords(text, ai_questions)
+    
+    def analyze_questions_batch(self, texts):
+        """Batch version of analyze_questions (AI runs in length-bucketed mini-batches)"""
+        texts = [str(t) for t in texts]
+        ai_results = [[] for _ in texts]
+        ai_rows = [i for i, text in enumerate(texts) if self._needs_ai(text)]
+        
+        if ai_rows and self._ai_available():
+            try:
+                with instrumentation.timer('question.ai_batch'):
+                    predictions = self.ai_model.classify_batch([texts[i] for i in ai_rows], 'questions')
+                for i, p in zip(ai_rows, predictions):
+                    ai_results[i] = self._questions_from_prediction(p)
+            except Exception as e:
+                logger.warning("AI batch question detection failed: %s, using keywords", e)
+        
+        return [self._merge_with_keywords(text, ai_questions) for text, ai_questions in zip(texts, ai_results)]
+    
+    def _needs_ai(self, text):
+        """In cascade mode, skip the model when the keyword scan already found question types"""
+        if not config.CASCADE_MODE:
+            return True
+        if self.scan_signals(text)['question_types']:
+            self.cascade_counts['skipped'] += 1
+            return False
+        self.cascade_counts['sent_to_ai'] += 1
+        return True
+    
+    def _merge_with_keywords(self, text, ai_questions):
+        detected = list(ai_questions)
         
         # Rule-based detection (always run as fallback)
-        for q_type, data in self.patterns.items():
-            if any(kw in text_lower for kw in data['keywords']):
-                # Avoid duplicates from AI
-                if not any(q['type'] == q_type for q in detected):
-                    detected.append({
-                        'type': q_type,
-                        'priority': data['priority'],
-                        'urgency': data['urgency'],
-                        'source': 'keyword'
-                    })
+        for q_type in self.scan_signals(text)['question_types']:
+            # Avoid duplicates from AI
+            if not any(q['type'] == q_type for q in detected):
+                data = self.patterns[q_type]
+                detected.append({
+                    'type': q_type,
+                    'priority': data['priority'],
+                    'urgency': data['urgency'],
+                    'source': 'keyword'
+                })
         
         detected.sort(key=lambda x: x['priority'])
         return detected if detected else [{'type': 'General Inquiry', 'priority': 99, 'urgency': 'low', 'source': 'fallback'}]
@@ -203,31 +278,37 @@ class QuestionAnalyzer:
     def _analyze_questions_ai(self, text):
         """Detect question types using zero-shot classification (AI-powered)"""
         try:
-            results = []
-            text_short = text[:300]  # Limit text length
+            text_short = text[:config.AI_MAX_CHARS]  # Limit text length
             
             # Use zero-shot classification to find question types
-            predictions = self.ai_model(text_short, self.question_types, multi_class=True)
-            
-            # Process top predictions
-            for i, (label, score) in enumerate(zip(predictions['labels'][:2], predictions['scores'][:2])):
-                if score > 0.5:  # Only if confident
-                    # Map to our question types
-                    q_type = label
-                    priority = 3 if score > 0.7 else 4
-                    urgency = 'medium' if score > 0.7 else 'low'
-                    
-                    results.append({
-                        'type': q_type,
-                        'priority': priority,
-                        'urgency': urgency,
-                        'source': 'ai'
-                    })
-            
-            return results
+            predictions = self.ai_model.classify(text_short, 'questions')
+            return self._questions_from_prediction(predictions)
         except Exception:
             return []
     
+    def _questions_from_prediction(self, predictions):
+        """Turn one zero-shot prediction into question detections"""
+        results = []
+        if not predictions:  # neither the fast tier nor the model answered this text
+            return results
+        
+        # Process top predictions
+        for label, score in zip(predictions['labels'][:2], predictions['scores'][:2]):
+            if score > 0.5:  # Only if confident
+                # Map to our question types
+                q_type = label
+                priority = 3 if score > 0.7 else 4
+                urgency = 'medium' if score > 0.7 else 'low'
+                
+                results.append({
+                    'type': q_type,
+                    'priority': priority,
+                    'urgency': urgency,
+                    'source': 'ai'
+                })
+        
+        return results
+    
     def get_primary_question(self, questions):
         return questions[0]['type'] if questions else 'General Inquiry'
     
@@ -245,86 +326,45 @@ class QuestionAnalyzer:
                 return "medium"
         return "low"
     
-    def is_ready_to_buy(self, text):
+    def scan_signals(self, text):
+        """Every keyword signal for `text` from a single pass of the scanner.
+        
+        Returns question_types (in pattern order), ready_to_buy, timeframe and
+        urgency_modifier. The last result is memoised because callers ask for
+        each signal of the same message in turn.
+        """
         text_lower = text.lower()
-        keywords = [
-            'i will come', 'coming', 'will buy', 'want to buy',
-            'today', 'tomorrow', 'keep one', 'reserve',
-            'එනවා', 'ගන්නම්', 'අද', 'හෙට', 'ennada', 'gemak'
-        ]
-        return any(kw in text_lower for kw in keywords)
+        if self._last_scan[0] == text_lower:
+            return self._last_scan[1]
+        
+        with instrumentation.timer('question.keyword_scan'):
+            hits = self._scanner.find(text_lower)
+            urgency = sum(self.urgency_points[level] for level in self.urgent_words if ('urgency', level) in hits)
+            signals = {
+                'question_types': [q_type for q_type in self.patterns if ('question', q_type) in hits],
+                'ready_to_buy': ('ready', None) in hits,
+                'timeframe': next((tf for tf in self.timeframes if ('timeframe', tf) in hits), "Not specified"),
+                'urgency_modifier': min(urgency, 10),
+            }
+        self._last_scan = (text_lower, signals)
+        return signals
+    
+    def is_ready_to_buy(self, text):
+        return self.scan_signals(text)['ready_to_buy']
     
     def detect_timeframe(self, text):
-        text_lower = text.lower()
-        
-        timeframes = {
-            'Today': ['today', 'අද', 'right now', 'now', 'asap', 'today itself'],
-            'Tomorrow': ['tomorrow', 'හෙට', 'tmrw', 'tmr'],
-            'This Weekend': ['weekend', 'saturday', 'sunday'],
-            'Next Week': ['next week', 'ලබන සතියේ'],
-            'This Month': ['this month', 'මේ මාසේ'],
-        }
-        
-        for tf, keywords in timeframes.items():
-            if any(kw in text_lower for kw in keywords):
-                return tf
-        
-        return "Not specified"
+        return self.scan_signals(text)['timeframe']
     
     def segment_customer(self, text, history_count, intent_score):
         """
         Segment customers for personalized handling
         Score should be between 0.0 and 1.0
         """
-        if history_count == 0:
-            if intent_score > 0.8:
-                return "🔥 Hot Lead"  # New but very interested
-            elif intent_score > 0.6:
-                return "✨ Warm Lead"
-            else:
-                return "📋 New Prospect"
-        
-        elif history_count <= 2:
-            if intent_score > 0.8:
-                return "🎯 Engaged Buyer"
-            elif intent_score > 0.6:
-                return "💬 Interested"
-            else:
-                return "📊 Browsing"
-        
-        else:
-            if intent_score > 0.8:
-                return "👑 VIP Customer"
-            elif intent_score > 0.6:
-                return "🤝 Regular Customer"
-            else:
-                return "💼 Returning"
+        return intent_scoring.segment_customers([history_count], [intent_score])[0]
     
     def detect_urgency_modifiers(self, text):
         """
         Detect urgent language patterns
         Returns urgency score 0-10
         """
-        text_lower = text.lower()
-        
-        urgent_words = {
-            'extreme': ['asap', 'urgent', 'emergency', 'immediately', 'right now', 'hurry'],
-            'high': ['today', 'now', 'soon', 'quick', 'fast'],
-            'medium': ['tomorrow', 'this week', 'this weekend'],
-            'low': ['eventually', 'whenever', 'no rush']
-        }
-        
-        urgency = 0
-        
-        for level, words in urgent_words.items():
-            if any(word in text_lower for word in words):
-                if level == 'extreme':
-                    urgency += 10
-                elif level == 'high':
-                    urgency += 7
-                elif level == 'medium':
-                    urgency += 4
-                elif level == 'low':
-                    urgency += 1
-        
-        return min(urgency, 10)
+        return self.scan_signals(text)['urgency_modifier']
@@ -0,0 +1,93 @@
+# report_writer.py - daily + priority reports from one result set (streaming xlsx, CSV or Parquet)
+from pathlib import Path
+
+import config
+import instrumentation
+import results_table
+
+FORMATS = ('xlsx', 'csv', 'parquet')
+SUMMARY_LEVELS = [('Very High', 'very_high'), ('High', 'high'), ('Medium', 'medium'), ('Low', 'low')]
+COLUMN_WIDTHS = {'message': 60, 'questions': 40, 'product': 24, 'customer_segment': 20, 'date': 18}
+
+
+def write_reports(results, today, tag=None, fmt=None):
+    """Write the daily and priority reports for `results` (a results_table frame).
+
+    Everything is derived from one pass over the result set: the report
+    layout, the intent counts, the priority rows and the product demand.
+    xlsx is written with xlsxwriter in constant-memory mode (one daily
+    workbook with Summary, Messages, Priority and Product Demand sheets,
+    plus the priority workbook). csv and parquet write the messages and
+    priority tables only. Returns {'daily': path, 'priority': path or None,
+    'priority_rows': n}.
+    """
+    fmt = fmt or config.REPORT_FORMAT
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown report format '{fmt}' (expected one of {', '.join(FORMATS)})")
+    suffix = f"{today}_{tag}" if tag else today
+    daily_file = Path(config.DAILY_REPORTS) / f"report_{suffix}.{fmt}"
+    priority_file = Path(config.PRIORITY_REPORTS) / f"priority_{suffix}.{fmt}"
+
+    with instrumentation.timer(f'reports.write.{fmt}'):
+        report = results_table.for_report(results)
+        priority = report.loc[results_table.priority(results).index]
+        if fmt == 'xlsx':
+            stats = results_table.intent_stats(results)
+            summary = [('Date', today), ('Total', stats['total'])]
+            summary += [(label, stats[key]) for label, key in SUMMARY_LEVELS]
+            demand = results_table.product_demand(results)
+            total = int(demand.sum())
+            demand_rows = [
+                (str(product), int(count), round(count / total * 100, 1)) for product, count in demand.items()
+            ]
+            write_xlsx(daily_file, [
+                ('Summary', ['Metric', 'Value'], summary),
+                ('Messages', list(report.columns), _rows(report)),
+                ('Priority', list(priority.columns), _rows(priority)),
+                ('Product Demand', ['Product', 'Requests', 'Percentage'], demand_rows),
+            ])
+            if len(priority):
+                write_xlsx(priority_file, [('Priority', list(priority.columns), _rows(priority))])
+        elif fmt == 'csv':
+            report.to_csv(daily_file, index=False)
+            if len(priority):
+                priority.to_csv(priority_file, index=False)
+        else:
+            # Parquet keeps the typed columns (categoricals, numeric score) as they are
+            results.to_parquet(daily_file, index=False)
+            if len(priority):
+                results.loc[priority.index].to_parquet(priority_file, index=False)
+    instrumentation.count('reports.rows', len(report))
+    return {'daily': daily_file, 'priority': priority_file if len(priority) else None, 'priority_rows': len(priority)}
+
+
+def write_xlsx(path, sheets):
+    """Stream [(sheet name, header, rows)] into a workbook; each row is written once and flushed"""
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(str(path), {
+        'constant_memory': True,
+        'default_date_format': 'yyyy-mm-dd hh:mm',
+        # Customer text is data: never turn it into formulas or links
+        'strings_to_formulas': False,
+        'strings_to_urls': False,
+        'nan_inf_to_errors': True,
+    })
+    try:
+        bold = workbook.add_format({'bold': True})
+        for name, header, rows in sheets:
+            sheet = workbook.add_worksheet(name)
+            for col, column in enumerate(header):
+                sheet.set_column(col, col, COLUMN_WIDTHS.get(column, 14))
+            sheet.write_row(0, 0, header, bold)
+            for row_number, row in enumerate(rows, 1):
+                sheet.write_row(row_number, 0, row)
+    finally:
+        workbook.close()
+    return path
+
+
+def _rows(report):
+    """Rows of a report frame as plain tuples (missing dates as blanks)"""
+    dates = report['date'].astype(object).where(report['date'].notna(), None)
+    return report.assign(date=dates).itertuples(index=False, name=None)
@@ -0,0 +1,107 @@
+# results_table.py - analysis results as one typed DataFrame shared by the CLI, the app and the reports
+import numpy as np
+import pandas as pd
+
+# Ordered low -> very high, so `intent >= 'High'` and sorting by intent both work
+INTENT_LEVELS = ['Low', 'Medium', 'High', 'Very High']
+PRIORITY_INTENTS = ['Very High', 'High']
+CATEGORY_COLUMNS = ['product', 'questions', 'timeframe', 'stage', 'customer_segment']
+COLUMNS = [
+    'date', 'username', 'message', 'product', 'questions', 'intent', 'score',
+    'timeframe', 'ready_to_buy', 'stage', 'message_number', 'customer_segment',
+]
+# Column layout of the reports, the CSV downloads and the state store
+REPORT_COLUMNS = [
+    'username', 'date', 'message', 'product', 'questions', 'intent',
+    'intent_score', 'timeframe', 'ready', 'customer_segment',
+]
+NOT_SPECIFIED = 'Not specified'
+
+
+def build(groups, analyses):
+    """One row per analysed conversation from group_messages rows + analyze_batch output.
+
+    Repeated labels (intent, product, questions, timeframe, stage, segment)
+    are categoricals, the score is a float and ready_to_buy a bool, so a day
+    of results is a few compact columns instead of a list of dicts.
+    """
+    return typed(pd.DataFrame({
+        'date': pd.to_datetime(groups['date'], errors='coerce').to_numpy(),
+        'username': groups['username'].to_numpy(dtype=object),
+        'message': groups['message'].to_numpy(dtype=object),
+        'product': analyses['product'].to_numpy(),
+        'questions': analyses['questions'].to_numpy(),
+        'intent': analyses['intent'].to_numpy(),
+        'score': analyses['score'].to_numpy(dtype=float),
+        'timeframe': analyses['timeframe'].to_numpy(),
+        'ready_to_buy': analyses['ready_to_buy'].to_numpy(dtype=bool),
+        'stage': analyses['stage'].to_numpy(),
+        'message_number': analyses['history_count'].to_numpy(dtype=np.int64) + 1,
+        'customer_segment': analyses['customer_segment'].to_numpy(),
+    }))
+
+
+def typed(results):
+    """Apply the result dtypes (categoricals, float32 score, int32 message number)"""
+    results = results.reset_index(drop=True)
+    results['intent'] = pd.Categorical(results['intent'], categories=INTENT_LEVELS, ordered=True)
+    for column in CATEGORY_COLUMNS:
+        results[column] = results[column].astype('category')
+    results['score'] = results['score'].astype('float32')
+    results['message_number'] = results['message_number'].astype('int32')
+    return results[COLUMNS]
+
+
+def empty():
+    return typed(pd.DataFrame({column: [] for column in COLUMNS}))
+
+
+def concat(frames):
+    """Stack per-chunk result frames (categories are merged, dtypes kept)"""
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return empty()
+    if len(frames) == 1:
+        return frames[0]
+    return typed(pd.concat(frames, ignore_index=True))
+
+
+def priority(results):
+    """High and Very High intent rows, strongest first"""
+    rows = results[results['intent'].isin(PRIORITY_INTENTS)]
+    return rows.sort_values(['intent', 'score'], ascending=False, kind='stable')
+
+
+def intent_stats(results):
+    """{'total', 'very_high', 'high', 'medium', 'low'} counts"""
+    counts = results['intent'].value_counts()
+    return {
+        'total': len(results),
+        **{level.lower().replace(' ', '_'): int(counts.get(level, 0)) for level in reversed(INTENT_LEVELS)},
+    }
+
+
+def counts(results, column):
+    """Non-empty value counts of a column, most common first (unused categories dropped)"""
+    values = results[column].value_counts()
+    return values[values > 0]
+
+
+def product_demand(results):
+    demand = counts(results, 'product')
+    return demand.drop(NOT_SPECIFIED, errors='ignore')
+
+
+def question_counts(results):
+    """How often each question type was asked (a message can ask several)"""
+    questions = results['questions'].astype(str).str.split(', ').explode()
+    return questions.value_counts()
+
+
+def for_report(results):
+    """Results in REPORT_COLUMNS layout, with the score as a percentage and ready as YES/NO"""
+    report = results[['username', 'date', 'message', 'product', 'questions', 'intent', 'timeframe',
+                      'customer_segment']].copy()
+    report['intent_score'] = (results['score'].astype(float) * 100).round().astype(int).astype(str) + '%'
+    report['ready'] = np.where(results['ready_to_buy'], 'YES', 'NO')
+    return report[REPORT_COLUMNS]
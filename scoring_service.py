@@ -0,0 +1,296 @@
+# scoring_service.py - local HTTP/JSON triage service with micro-batched model calls
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import analysis_pipeline
+import config
+import instrumentation
+import model_registry
+import results_table
+from logging_config import get_logger, setup_logging
+
+logger = get_logger('scoring_service')
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Coalesce messages from concurrent requests into one analyze_batch call.
+
+    A single thread owns the detectors. It takes the first waiting message,
+    then keeps collecting until it has `max_batch` messages or `max_wait_ms`
+    has passed, and analyses them together. Each submitted message gets a
+    Future with its result row.
+    """
+
+    def __init__(self, product_detector, question_analyzer, max_batch=None, max_wait_ms=None):
+        self.product_detector = product_detector
+        self.question_analyzer = question_analyzer
+        self.max_batch = max_batch or config.SERVICE_MAX_BATCH
+        self.max_wait = (config.SERVICE_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.batches = 0
+        self.batched_messages = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, items):
+        """Queue (text, post_product, history_count) items; returns one Future per item"""
+        futures = []
+        for item in items:
+            future = Future()
+            self._queue.put((item, future))
+            futures.append(future)
+        return futures
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _collect(self):
+        """Block for one message, then gather more until the batch is full or the wait is over"""
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                entry = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                self._queue.put(_STOP)  # finish this batch, stop on the next round
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                with instrumentation.timer('service.batch'):
+                    analyses = analysis_pipeline.analyze_batch(
+                        self.product_detector, self.question_analyzer,
+                        [text for text, _, _ in items],
+                        [post_product for _, post_product, _ in items],
+                        [history for _, _, history in items],
+                    )
+            except Exception as e:
+                logger.exception("Batch of %d messages failed", len(batch))
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.batched_messages += len(batch)
+            for future, row in zip(futures, analyses.to_dict('records')):
+                future.set_result(row)
+
+
+class ServiceMetrics:
+    """Request counts, throughput and latency percentiles over the last `window` requests"""
+
+    def __init__(self, window=2048):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.messages = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=window)
+
+    def record(self, seconds, messages):
+        with self._lock:
+            self.requests += 1
+            self.messages += messages
+            self.latencies.append(seconds)
+
+    def error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self, batcher=None):
+        with self._lock:
+            uptime = time.perf_counter() - self.started
+            latencies = np.array(self.latencies) * 1000
+            snapshot = {
+                'uptime_seconds': round(uptime, 1),
+                'requests': self.requests,
+                'messages': self.messages,
+                'errors': self.errors,
+                'messages_per_sec': round(self.messages / uptime, 2) if uptime else None,
+                'latency_ms': {
+                    name: round(float(np.percentile(latencies, q)), 2) if len(latencies) else None
+                    for name, q in [('p50', 50), ('p95', 95), ('p99', 99), ('max', 100)]
+                },
+            }
+        if batcher is not None:
+            snapshot['batches'] = batcher.batches
+            snapshot['mean_batch_size'] = round(batcher.batched_messages / batcher.batches, 2) if batcher.batches else None
+        return snapshot
+
+
+def parse_messages(payload):
+    """(text, post_product, history_count) items from a request body.
+
+    Accepts {"message": ...}, {"messages": [...]} or a bare list; each
+    message is a string or {"message", "post_product", "history_count"}.
+    """
+    if isinstance(payload, dict) and 'message' in payload:
+        messages = [payload]
+    elif isinstance(payload, dict) and 'messages' in payload:
+        messages = payload['messages']
+    else:
+        messages = payload
+    if not isinstance(messages, list) or not messages:
+        raise ValueError("Send {\"message\": ...} or {\"messages\": [...]} with at least one message")
+    if len(messages) > config.SERVICE_MAX_MESSAGES:
+        raise ValueError(f"At most {config.SERVICE_MAX_MESSAGES} messages per request")
+
+    items = []
+    for entry in messages:
+        if isinstance(entry, str):
+            entry = {'message': entry}
+        if not isinstance(entry, dict) or not isinstance(entry.get('message'), str):
+            raise ValueError("Each message must be a string or an object with a \"message\" string")
+        try:
+            history = int(entry.get('history_count') or 0)
+        except (TypeError, ValueError):
+            raise ValueError("history_count must be an integer")
+        if history < 0:
+            raise ValueError("history_count can't be negative")
+        items.append((entry['message'].strip(), str(entry.get('post_product') or '').strip(), history))
+    return items
+
+
+def to_json(row):
+    """One analysis row as the API returns it"""
+    return {
+        'product': row['product'],
+        'questions': row['questions'],
+        'intent': row['intent'],
+        'score': round(float(row['score']), 4),
+        'priority': row['intent'] in results_table.PRIORITY_INTENTS,
+        'timeframe': row['timeframe'],
+        'ready_to_buy': bool(row['ready_to_buy']),
+        'stage': row['stage'],
+        'customer_segment': row['customer_segment'],
+    }
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with a listen backlog sized for request bursts.
+
+    socketserver's default backlog of 5 drops connections (reset by the OS)
+    when more clients connect at once than that, which is exactly the load
+    the micro-batcher is built for.
+    """
+
+    daemon_threads = True
+    request_queue_size = max(128, 4 * config.SERVICE_MAX_BATCH)
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    server_version = 'IGTrackerScoring/1.0'
+
+    def do_GET(self):
+        if self.path == '/health':
+            ai_model = model_registry.get_model()
+            fast_tier = ai_model.fast_tier.version if ai_model.fast_tier_ready() else None
+            self._send(200, {'status': 'ok', 'model': ai_model.status, 'ai_ready': ai_model.is_ready(),
+                             'fast_tier': fast_tier})
+        elif self.path == '/metrics':
+            metrics = self.server.metrics.snapshot(self.server.batcher)
+            metrics['pipeline'] = instrumentation.get_metrics().snapshot()
+            self._send(200, metrics)
+        else:
+            self._send(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/analyze':
+            self._send(404, {'error': f"Unknown path {self.path}"})
+            return
+        started = time.perf_counter()
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            items = parse_messages(json.loads(self.rfile.read(length) or b'null'))
+        except ValueError as e:  # includes malformed JSON
+            self.server.metrics.error()
+            self._send(400, {'error': str(e)})
+            return
+
+        try:
+            futures = self.server.batcher.submit(items)
+            results = [to_json(future.result()) for future in futures]
+        except Exception as e:
+            self.server.metrics.error()
+            self._send(500, {'error': str(e)})
+            return
+        seconds = time.perf_counter() - started
+        self.server.metrics.record(seconds, len(items))
+        self._send(200, {'results': results, 'ms': round(seconds * 1000, 2)})
+
+    def _send(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def make_server(host=None, port=None, max_batch=None, max_wait_ms=None):
+    """HTTP server with the detectors loaded once and a MicroBatcher in front of them"""
+    from product_detector import ProductDetector
+    from question_analyzer import QuestionAnalyzer
+
+    server = ScoringServer((host or config.SERVICE_HOST, config.SERVICE_PORT if port is None else port),
+                           ScoringHandler)
+    server.batcher = MicroBatcher(ProductDetector(), QuestionAnalyzer(), max_batch, max_wait_ms)
+    server.metrics = ServiceMetrics()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve message triage over HTTP/JSON')
+    parser.add_argument('--host', default=config.SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=config.SERVICE_PORT)
+    parser.add_argument('--max-batch', type=int, default=config.SERVICE_MAX_BATCH,
+                        help='Most messages analysed in one model batch')
+    parser.add_argument('--max-wait-ms', type=float, default=config.SERVICE_MAX_WAIT_MS,
+                        help='How long a batch waits for more messages')
+    args = parser.parse_args(argv)
+
+    config.setup_directories()
+    setup_logging()
+    server = make_server(args.host, args.port, args.max_batch, args.max_wait_ms)
+    host, port = server.server_address[:2]
+    print(f"🛰️  Scoring service on http://{host}:{port} (AI model: {model_registry.get_model().status})")
+    print("   POST /analyze  {\"message\": \"...\"} or {\"messages\": [...]}")
+    print("   GET  /health, /metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping...")
+    finally:
+        server.server_close()
+        server.batcher.close()
+
+
+if __name__ == '__main__':
+    main()
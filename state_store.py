@@ -0,0 +1,183 @@
+# state_store.py - incremental record of processed messages and their analysis
+import hashlib
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+import config
+
+RESULT_COLUMNS = [
+    'username', 'date', 'message', 'product', 'questions', 'intent',
+    'intent_score', 'timeframe', 'ready', 'customer_segment',
+]
+
+ID_COLUMNS = ['message_id', 'id']
+
+
+def message_ids(df):
+    """Stable ID per row: the export's own id column if it has one, else a content hash"""
+    for column in ID_COLUMNS:
+        if column in df.columns:
+            return [str(v).strip() for v in df[column]]
+
+    dates = pd.to_datetime(df['date'], errors='coerce')
+    ids = []
+    for username, date, message in zip(df['username'], dates, df['message']):
+        stamp = '' if pd.isna(date) else date.isoformat()
+        raw = "\x1f".join([str(username).strip(), stamp, str(message).strip()])
+        ids.append(hashlib.sha1(raw.encode('utf-8')).hexdigest())
+    return ids
+
+
+class StateStore:
+    """SQLite state for the batch analyzer.
+
+    Holds processed message IDs, the analysis of every message this tool
+    processed, and a per-user processed-message counter. Each run only
+    touches the rows for its new messages; the Excel export is never
+    rewritten.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or config.STATE_DB
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " message_id TEXT PRIMARY KEY, username TEXT, date TEXT, message TEXT,"
+            " product TEXT, questions TEXT, intent TEXT, intent_score TEXT,"
+            " timeframe TEXT, ready TEXT, customer_segment TEXT,"
+            " source TEXT NOT NULL, processed_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS user_counts ("
+            " username TEXT PRIMARY KEY, processed INTEGER NOT NULL);"
+        )
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def known_ids(self, ids):
+        """Subset of `ids` already recorded as processed"""
+        ids = list(dict.fromkeys(ids))
+        known = set()
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT message_id FROM messages WHERE message_id IN ({marks})", chunk
+                ).fetchall()
+                known.update(r[0] for r in rows)
+        return known
+
+    def user_counts(self, usernames):
+        """{username: processed message count} for the given users"""
+        usernames = list(dict.fromkeys(usernames))
+        counts = {}
+        with self._lock:
+            for start in range(0, len(usernames), 500):
+                chunk = usernames[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT username, processed FROM user_counts WHERE username IN ({marks})", chunk
+                ).fetchall()
+                counts.update(rows)
+        return counts
+
+    def mark_imported(self, rows):
+        """Record (message_id, username, date) rows the export already marked processed"""
+        self._insert([
+            {'message_id': message_id, 'username': username, 'date': date}
+            for message_id, username, date in rows
+        ], source='import')
+
+    def mark_skipped(self, rows):
+        """Record (message_id, username, date) rows with no text to analyse; they don't count as history"""
+        self._insert([
+            {'message_id': message_id, 'username': username, 'date': date}
+            for message_id, username, date in rows
+        ], source='skipped')
+
+    def record_results(self, rows):
+        """Record analysed messages; each row is a dict with message_id + RESULT_COLUMNS.
+
+        A row may also carry `grouped_ids`, the other messages combined into it
+        (same user, same day). They are recorded as processed and count towards
+        the user's history, but the analysis is stored once, under message_id.
+        """
+        rows = list(rows)
+        self._insert(rows, source='analyzer')
+        self._insert([
+            {'message_id': message_id, 'username': row['username'], 'date': row['date']}
+            for row in rows
+            for message_id in row.get('grouped_ids', ())
+        ], source='grouped')
+
+    def _insert(self, rows, source):
+        if not rows:
+            return
+        now = time.time()
+        columns = ['message_id'] + RESULT_COLUMNS
+        values = [
+            tuple(_to_sql(row.get(c)) for c in columns) + (source, now)
+            for row in rows
+        ]
+        per_user = {}
+        for row in rows if source != 'skipped' else ():
+            username = str(row['username']).strip()
+            per_user[username] = per_user.get(username, 0) + 1
+
+        with self._lock:
+            cursor = self._conn.executemany(
+                f"INSERT OR IGNORE INTO messages ({', '.join(columns)}, source, processed_at)"
+                f" VALUES ({', '.join('?' * (len(columns) + 2))})",
+                values,
+            )
+            if cursor.rowcount == len(values):
+                self._conn.executemany(
+                    "INSERT INTO user_counts VALUES (?, ?)"
+                    " ON CONFLICT(username) DO UPDATE SET processed = processed + excluded.processed",
+                    list(per_user.items()),
+                )
+            else:
+                # Some rows were already known; recount only the affected users
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO user_counts"
+                    " SELECT username, COUNT(*) FROM messages"
+                    " WHERE username = ? AND source != 'skipped' GROUP BY username",
+                    [(u,) for u in per_user],
+                )
+            self._conn.commit()
+
+    def results(self, since=None):
+        """Analysed messages (not imported ones) as a DataFrame, optionally from `since` on"""
+        query = f"SELECT message_id, {', '.join(RESULT_COLUMNS)} FROM messages WHERE source = 'analyzer'"
+        params = []
+        if since is not None:
+            query += " AND processed_at >= ?"
+            params.append(pd.Timestamp(since).timestamp())
+        with self._lock:
+            return pd.read_sql_query(query, self._conn, params=params)
+
+    def export_excel(self, path, since=None):
+        """Write analysed messages to an Excel file (export only; the store stays the source of truth)"""
+        df = self.results(since)
+        df.to_excel(path, index=False)
+        return path
+
+
+def _to_sql(value):
+    if value is None:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return None if pd.isna(value) else value.isoformat()
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return str(value)
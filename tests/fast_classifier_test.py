@@ -0,0 +1,81 @@
+# fast_classifier_test.py - the fast tier keeps its trained settings and answers before the NLI model
+import pytest
+
+import config
+import fast_classifier
+
+
+def test_loaded_tier_keeps_its_trained_threshold(tmp_path, monkeypatch):
+    joblib = pytest.importorskip('joblib')
+    monkeypatch.setattr(config, 'FAST_TIER_THRESHOLD', 0.85)
+    path = tmp_path / 'fast_tier.joblib'
+    joblib.dump(fast_classifier.FastTier(None, None, None, {}, threshold=0.6, version='t'), path)
+
+    assert fast_classifier.load_fast_tier(path).threshold == 0.6
+
+
+def test_labelling_does_not_switch_the_fast_tier_off(monkeypatch):
+    monkeypatch.setattr(config, 'AI_LOAD_MODE', 'off')
+    monkeypatch.setattr(config, 'FAST_TIER_ENABLED', True)
+
+    products, questions, label_sets = fast_classifier.label_messages(['iphone 15 price?', 'hi'])
+
+    assert config.FAST_TIER_ENABLED is True
+    assert products[0] == 'iPhone' and products[1] == fast_classifier.NO_PRODUCT
+    assert questions[0] == ['Price']
+    assert set(label_sets) == {'products', 'questions'}
+
+
+class SureAboutIpads:
+    """Stand-in tier: confident only about texts mentioning an ipad"""
+
+    version = 'test'
+
+    def covers(self, label_sets):
+        return True
+
+    def predict(self, texts):
+        return [
+            {'products': {'labels': ['iPad', 'iPhone'], 'scores': [0.95, 0.05]},
+             'questions': {'labels': ['Price'], 'scores': [0.9]}} if 'ipad' in text else None
+            for text in texts
+        ]
+
+
+def make_model(load_mode, **kwargs):
+    import model_registry
+
+    nli = model_registry.NLIModel(load_mode=load_mode, fast_tier_enabled=False, **kwargs)
+    nli.register_labels('products', ['iPhone', 'iPad'])
+    nli.register_labels('questions', ['Price'], multi_label=True)
+    nli.fast_tier = SureAboutIpads()
+    return nli
+
+
+def test_fast_tier_answers_with_the_model_off():
+    from product_detector import ProductDetector
+
+    nli = make_model('off')
+    assert nli.classify_batch(['need an ipad', 'hello'], 'products') == [
+        {'labels': ['iPad', 'iPhone'], 'scores': [0.95, 0.05]}, None,
+    ]
+    assert nli.status == 'disabled'
+    assert nli.cache_id == 'fast-test'
+    assert (nli.fast_hits, nli.fast_checked, nli.model_texts) == (1, 2, 0)
+
+    found = ProductDetector(ai_model=nli).detect_products_batch(['need an ipad', 'hello'], ['', ''])
+    assert [p['source'] for p in found[0]] == ['ai'] and found[0][0]['product'] == 'iPad'
+    assert found[1][0]['product'] == 'Not specified'
+
+
+def test_model_loads_only_for_texts_the_tier_is_unsure_about(tiny_model):
+    nli = make_model('lazy', model_id=tiny_model, backend='pytorch')
+
+    nli.classify_batch(['ipad price ?'], 'products')
+    assert nli.status == 'not loaded'
+
+    nli.classify_batch(['iphone price ?'], 'products')  # unsure: starts the model in the background
+    assert nli.wait_until_ready(timeout=120), nli.load_error
+    prediction = nli.classify('iphone price ?', 'products')
+    assert prediction is not None and set(prediction['labels']) == {'iPhone', 'iPad'}
+    assert nli.model_texts == 1
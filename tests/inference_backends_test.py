@@ -0,0 +1,27 @@
+# inference_backends_test.py - the parity check compares two models without touching global settings
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('transformers')
+
+import config
+import inference_backends
+import model_registry
+
+
+def test_parity_check_leaves_config_and_shared_model_alone(tiny_model, monkeypatch):
+    monkeypatch.setattr(config, 'NLI_MODEL_ID', tiny_model)
+    monkeypatch.setattr(model_registry, '_shared_model', None)
+    before = (config.AI_LOAD_MODE, config.FAST_TIER_ENABLED, config.INFERENCE_BACKEND)
+
+    report = inference_backends.parity_check(['iphone price ?', 'ipad delivery ?'], 'pytorch-int8')
+
+    assert set(report['label_sets']) == {'products', 'questions'}
+    assert report['messages'] == 2
+    assert (config.AI_LOAD_MODE, config.FAST_TIER_ENABLED, config.INFERENCE_BACKEND) == before
+    assert model_registry._shared_model is None
+
+
+def test_parity_check_rejects_comparing_the_reference_with_itself():
+    with pytest.raises(ValueError):
+        inference_backends.parity_check(['iphone'], 'pytorch')
@@ -0,0 +1,52 @@
+# intent_scoring_test.py - pin the intent and segment cutoffs (a score on a cutoff belongs to the band above)
+import pytest
+
+import config
+import intent_scoring
+
+
+@pytest.mark.parametrize('score, intent', [
+    (1.0, 'Very High'),
+    (0.8, 'Very High'),
+    (0.799999, 'High'),
+    (0.6, 'High'),
+    (0.599999, 'Medium'),
+    (0.4, 'Medium'),
+    (0.399999, 'Low'),
+    (0.0, 'Low'),
+])
+def test_intent_levels_at_thresholds(score, intent):
+    assert config.INTENT_THRESHOLDS == {'very_high': 0.8, 'high': 0.6, 'medium': 0.4, 'low': 0.0}
+    assert list(intent_scoring.intent_levels([score])) == [intent]
+
+
+@pytest.mark.parametrize('history, score, segment', [
+    (0, 0.8, '🔥 Hot Lead'),
+    (0, 0.799999, '✨ Warm Lead'),
+    (0, 0.6, '✨ Warm Lead'),
+    (0, 0.599999, '📋 New Prospect'),
+    (0, 0.4, '📋 New Prospect'),
+    (1, 0.8, '🎯 Engaged Buyer'),
+    (2, 0.6, '💬 Interested'),
+    (2, 0.599999, '📊 Browsing'),
+    (3, 0.8, '👑 VIP Customer'),
+    (3, 0.6, '🤝 Regular Customer'),
+    (3, 0.599999, '💼 Returning'),
+])
+def test_segments_at_thresholds(history, score, segment):
+    assert list(intent_scoring.segment_customers([history], [score])) == [segment]
+
+
+def test_summed_signals_land_on_the_cutoffs():
+    # base 0.3 + other timeframe 0.1 / + ready 0.3 / + ready 0.3 + urgency 10 * 0.02
+    batch = intent_scoring.score_batch(
+        urgent_questions=[0, 0, 0],
+        ready_to_buy=[False, True, True],
+        timeframe=['Next week', 'Not specified', 'Not specified'],
+        history_count=[0, 0, 0],
+        urgency_modifier=[0, 0, 10],
+    )
+    assert list(batch['score']) == [0.4, 0.6, 0.8]
+    assert list(batch['intent']) == ['Medium', 'High', 'Very High']
+    assert list(batch['customer_segment']) == ['📋 New Prospect', '✨ Warm Lead', '🔥 Hot Lead']
+    assert list(batch['stage']) == ['Initial Contact'] * 3
@@ -0,0 +1,87 @@
+# keyword_matcher_test.py - the Aho-Corasick matcher must agree with the per-alias regex it replaced
+import re
+
+import pytest
+
+import config
+from keyword_matcher import KeywordMatcher
+
+KEYWORDS = [
+    'iphone', 'iphone 15', 'iphone 15 pro', 'pro max', '15', 'max',  # nested and overlapping
+    'ipad', 'pad', 'air', 'macbook air', 'm2',
+    's24', 'galaxy s24', 'redmi note 13',
+    'ෆෝන්', 'ෆෝන් එක', 'ලැප්ටොප්',  # Sinhala (vowel signs are not \w)
+    'c_type', '_', '5g',
+]
+
+CORPUS = [
+    'iphone 15 pro max price?',
+    'iPhone15 available?'.lower(),
+    'need the iphone_15 asap',
+    'is the ipad air m2 in stock',
+    'ipads and airpods',
+    'galaxy s24+ 5g price',
+    'galaxy s245 or s24?',
+    'redmi note 13 pro',
+    'ෆෝන් එකක් තියෙනවද',
+    'iphone එක කීයද',
+    'ලැප්ටොප්ටද? macbook air එකක් ඕනේ',
+    'ෆෝන්15',
+    'c_type cable / c-type',
+    '__init__ 15_ _15 15',
+    'max-max pro max/15',
+    '',
+    '15',
+    'iphone',
+]
+
+
+def regex_find(keywords, text, whole_words):
+    """Baseline: one re.search per keyword (ProductDetector._match before the automaton)"""
+    found = set()
+    for keyword, payload in keywords:
+        pattern = re.escape(keyword)
+        if whole_words:
+            pattern = r'\b' + pattern + r'\b'
+        if re.search(pattern, text, re.IGNORECASE):
+            found.add(payload)
+    return found
+
+
+@pytest.mark.parametrize('whole_words', [True, False])
+@pytest.mark.parametrize('text', CORPUS)
+def test_find_matches_regex(text, whole_words):
+    keywords = [(keyword, keyword) for keyword in KEYWORDS]
+    assert KeywordMatcher(keywords).find(text, whole_words=whole_words) == regex_find(keywords, text, whole_words)
+
+
+def test_iter_matches_reports_every_overlapping_occurrence():
+    matcher = KeywordMatcher([('iphone 15', 'a'), ('15 pro', 'b'), ('15', 'c')])
+    assert sorted(matcher.iter_matches('iphone 15 pro 15')) == [
+        (0, 9, 'a'), (7, 9, 'c'), (7, 13, 'b'), (14, 16, 'c'),
+    ]
+
+
+def test_product_rules_match_baseline_in_catalog_order(monkeypatch):
+    monkeypatch.setattr(config, 'AI_LOAD_MODE', 'off')
+    from product_detector import ProductDetector
+
+    detector = ProductDetector()
+    texts = CORPUS + [
+        'MacBook Pro 16 and iPhone 15 Pro Max 256GB',
+        'samsung galaxy s24 ultra or pixel 8?',
+        'AirPods Pro 2 + Apple Watch Series 9',
+    ]
+    for text in texts:
+        # Baseline _detect_with_rules: walk the catalog, first matching alias of each model wins
+        expected = []
+        for category, models in detector.products.items():
+            for model_name, patterns in models.items():
+                if regex_find([(pattern, model_name) for pattern in patterns], text.lower(), whole_words=True):
+                    name = model_name.title()
+                    storage = detector._extract_storage(text)
+                    if storage:
+                        name += f' {storage}'
+                    if not detector._is_duplicate(name, expected):
+                        expected.append({'product': name, 'category': category, 'confidence': 'high', 'source': 'rules'})
+        assert detector._detect_with_rules(text.lower(), text) == expected, text
@@ -0,0 +1,35 @@
+# model_registry_test.py - the shared NLI model must not track gradients on any caller thread
+import threading
+
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('transformers')
+
+import config
+import model_registry
+
+
+def test_inference_off_the_loader_thread_builds_no_graph(tiny_model, monkeypatch):
+    monkeypatch.setattr(config, 'AI_LOAD_MODE', 'background')
+    monkeypatch.setattr(config, 'FAST_TIER_ENABLED', False)
+    nli = model_registry.NLIModel(model_id=tiny_model, backend='pytorch')
+    nli.register_labels('products', ['iPhone', 'iPad'])
+    nli.register_labels('questions', ['Price', 'Delivery'], multi_label=True)
+    nli.start_loading()
+    assert nli.wait_until_ready(timeout=120), nli.load_error
+
+    seen = []
+    nli.model.register_forward_hook(
+        lambda module, args, output: seen.append((threading.current_thread().name, output.logits.requires_grad))
+    )
+    nli.classify('this iphone price ?', 'products')  # the test's own thread
+
+    worker = threading.Thread(target=nli.classify_batch, args=(['ipad delivery ?'], 'questions'), name='caller')
+    worker.start()
+    worker.join()
+
+    assert [name for name, _ in seen] == [threading.current_thread().name, 'caller']
+    assert not any(requires_grad for _, requires_grad in seen)
+    # Inference must not flip the caller's own grad mode either
+    assert torch.is_grad_enabled()
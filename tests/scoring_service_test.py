@@ -0,0 +1,66 @@
+# scoring_service_test.py - the HTTP service under concurrent bursts and with malformed input
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import config
+import intent_scoring
+import model_registry
+import scoring_service
+
+
+@pytest.fixture
+def base_url(monkeypatch):
+    monkeypatch.setattr(config, 'AI_LOAD_MODE', 'off')
+    monkeypatch.setattr(config, 'FAST_TIER_ENABLED', False)
+    monkeypatch.setattr(config, 'ANALYSIS_CACHE_ENABLED', False)
+    monkeypatch.setattr(model_registry, '_shared_model', None)
+    server = scoring_service.make_server('127.0.0.1', 0, max_batch=32, max_wait_ms=20)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+    server.batcher.close()
+
+
+def post(base_url, body):
+    request = urllib.request.Request(base_url + '/analyze', data=json.dumps(body).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_concurrent_burst_is_not_dropped(base_url):
+    clients = 64  # well past socketserver's default listen backlog of 5
+    assert scoring_service.ScoringServer.request_queue_size >= clients
+    start = threading.Barrier(clients)
+    statuses = []
+
+    def client(i):
+        start.wait()
+        try:
+            statuses.append(post(base_url, {'message': f'macbook air m{i % 3 + 1} available tomorrow?'})[0])
+        except OSError as e:  # connection reset / refused
+            statuses.append(repr(e))
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [200] * clients
+
+
+def test_negative_history_count_is_rejected(base_url):
+    status, body = post(base_url, {'message': 'iphone 15 price?', 'history_count': -5})
+    assert status == 400 and 'history_count' in body['error']
+
+    status, body = post(base_url, {'message': 'iphone 15 price?', 'history_count': 0})
+    assert status == 200 and body['results'][0]['score'] >= intent_scoring.BASE_SCORE
@@ -0,0 +1,92 @@
+# state_store_test.py - incremental runs: only unseen rows are analysed, history counts stay exact
+import json
+
+import pytest
+
+import config
+import instrumentation
+import state_store
+
+HEADER = 'username,message,date,post_product\n'
+ROWS = [
+    'alice,iphone 15 price?,2026-01-05 10:00,\n',
+    'alice,can you deliver today?,2026-01-05 10:05,iPhone 15\n',
+    'bob,macbook air available?,2026-01-05 11:00,\n',
+    'bob,,2026-01-06 09:00,\n',  # blank message: recorded, but not history
+    'carol,hi,,\n',  # blank date
+]
+
+
+@pytest.fixture
+def analyzer(tmp_path, monkeypatch):
+    for name in ['DAILY_REPORTS', 'PRIORITY_REPORTS', 'WEEKLY_REPORTS', 'ARCHIVE_DIR', 'PROCESSED_DIR',
+                 'LOGS_DIR', 'CACHE_DIR', 'STATE_DIR', 'MODELS_DIR']:
+        monkeypatch.setattr(config, name, tmp_path / name.lower())
+    monkeypatch.setattr(config, 'STATE_DB', tmp_path / 'state.sqlite')
+    monkeypatch.setattr(config, 'AI_LOAD_MODE', 'off')
+    monkeypatch.setattr(config, 'ANALYSIS_CACHE_ENABLED', False)
+    monkeypatch.setattr(config, 'FAST_TIER_ENABLED', False)
+    monkeypatch.setattr(config, 'REPORT_FORMAT', 'csv')
+    from daily_analyzer import DailyAnalyzer
+
+    analyzer = DailyAnalyzer()
+    yield analyzer
+    analyzer.close()
+
+
+def run(analyzer, path):
+    """Analyse one export; returns the run's new-message count"""
+    analyzer.analyze_today(path)
+    with open(config.LOGS_DIR / instrumentation.METRICS_FILE, encoding='utf-8') as fh:
+        return json.loads(fh.readlines()[-1])['new_messages']
+
+
+def test_second_run_finds_nothing_new(analyzer, tmp_path):
+    export = tmp_path / 'export.csv'
+    export.write_text(HEADER + ''.join(ROWS), encoding='utf-8')
+
+    assert run(analyzer, export) == 5
+    counts = analyzer.state.user_counts(['alice', 'bob', 'carol'])
+    assert counts == {'alice': 2, 'bob': 1, 'carol': 1}
+
+    assert run(analyzer, export) == 0
+    assert analyzer.state.user_counts(['alice', 'bob', 'carol']) == counts
+
+    # A new message only adds itself, and to its own user's history
+    export.write_text(HEADER + ''.join(ROWS) + 'bob,is it in stock?,2026-01-07 08:00,\n', encoding='utf-8')
+    assert run(analyzer, export) == 1
+    assert analyzer.state.user_counts(['alice', 'bob', 'carol']) == {'alice': 2, 'bob': 2, 'carol': 1}
+
+
+def test_recording_known_rows_again_recounts(tmp_path):
+    store = state_store.StateStore(tmp_path / 'state.sqlite')
+    row = {'message_id': 'm1', 'username': 'alice', 'date': None, 'message': 'hi'}
+    store.record_results([row])
+    # INSERT OR IGNORE skips m1, so alice is recounted from the table instead of incremented
+    store.record_results([row, dict(row, message_id='m2')])
+    assert store.known_ids(['m1', 'm2', 'm3']) == {'m1', 'm2'}
+    assert store.user_counts(['alice']) == {'alice': 2}
+
+    store.mark_skipped([('m3', 'alice', None)])
+    store.record_results([row])  # forces a recount, which must leave skipped rows out too
+    assert store.known_ids(['m3']) == {'m3'}
+    assert store.user_counts(['alice']) == {'alice': 2}
+
+
+def test_message_ids_match_across_export_formats(tmp_path):
+    import pandas as pd
+
+    import ingest
+
+    rows = pd.DataFrame({
+        'username': ['alice', 'bob', 'carol', 'dan'],
+        'message': ['iphone price?', None, 15, 'hi'],  # mixed types keep an object column
+        'date': ['2026-01-05 10:00', '2026-01-06 09:00', None, '2026-01-07 08:00'],
+        'post_product': [None, None, None, None],
+    })
+    rows.to_excel(tmp_path / 'export.xlsx', index=False)
+    rows.to_csv(tmp_path / 'export.csv', index=False)
+    rows.to_json(tmp_path / 'export.jsonl', orient='records', lines=True)
+
+    ids = {fmt: state_store.message_ids(ingest.read_frame(tmp_path / f'export.{fmt}')) for fmt in ['xlsx', 'csv', 'jsonl']}
+    assert ids['xlsx'] == ids['csv'] == ids['jsonl']
@@ -0,0 +1,109 @@
+# watcher.py - long-running inbox processor: analyze new exports, then archive them
+import errno
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+
+import config
+import ingest
+from logging_config import get_logger
+
+logger = get_logger('watcher')
+
+
+class InboxWatcher:
+    """Poll an inbox folder and run every export dropped there through one DailyAnalyzer.
+
+    The analyzer (and its models) stays loaded between files, so each file
+    only costs its own messages. Only rows the state store hasn't seen are
+    analysed. After the reports are written, the file is moved into
+    PROCESSED_DIR (or FAILED_DIR if it couldn't be read). A file is picked
+    up once it has been unchanged for `settle_seconds`, so half-copied
+    exports are left alone.
+    """
+
+    def __init__(self, analyzer, inbox=None, processed_dir=None, failed_dir=None,
+                 interval=None, settle_seconds=None):
+        self.analyzer = analyzer
+        self.inbox = Path(inbox or config.INBOX_DIR)
+        self.processed_dir = Path(processed_dir or config.PROCESSED_DIR)
+        self.failed_dir = Path(failed_dir or config.FAILED_DIR)
+        self.interval = config.WATCH_INTERVAL if interval is None else interval
+        self.settle_seconds = config.WATCH_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+        for folder in (self.inbox, self.processed_dir, self.failed_dir):
+            folder.mkdir(parents=True, exist_ok=True)
+
+    def pending(self):
+        """Exports in the inbox that are ready to process, oldest first"""
+        now = time.time()
+        files = []
+        for path in self.inbox.iterdir():
+            if not path.is_file() or path.name.startswith(('~$', '.')):
+                continue
+            if path.suffix.lower() not in ingest.FORMATS:
+                continue
+            modified = path.stat().st_mtime
+            if now - modified >= self.settle_seconds:
+                files.append((modified, path))
+        return [path for _, path in sorted(files)]
+
+    def poll(self):
+        """Process every ready file once; returns [(archived path, results or None)]"""
+        done = []
+        for path in self.pending():
+            done.append(self.process(path))
+        return done
+
+    def process(self, path):
+        print(f"\n📥 {path.name}")
+        started = time.perf_counter()
+        try:
+            results = self.analyzer.analyze_today(path, report_tag=path.stem)
+        except Exception:
+            logger.exception("Failed to process %s", path)
+            results = None
+        target = self.failed_dir if results is None else self.processed_dir
+        archived = archive(path, target)
+        logger.info("Inbox file processed", extra={'fields': {
+            'file': path.name, 'archived_to': str(archived), 'ok': results is not None,
+            'analysed': 0 if results is None else len(results),
+            'seconds': round(time.perf_counter() - started, 3),
+        }})
+        print(f"{'📦' if results is not None else '⚠️ '} Moved to {archived}")
+        return archived, results
+
+    def run(self, once=False):
+        """Poll until interrupted (or a single pass with once=True)"""
+        print(f"👀 Watching {self.inbox} (every {self.interval:g}s, Ctrl+C to stop)")
+        try:
+            while True:
+                self.poll()
+                if once:
+                    return
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching")
+
+
+def archive(path, folder):
+    """Atomically move `path` into `folder`; the name gets a timestamp so repeats never collide"""
+    path = Path(path)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    target = Path(folder) / f"{path.stem}_{stamp}{path.suffix}"
+    counter = 1
+    while target.exists():
+        target = Path(folder) / f"{path.stem}_{stamp}_{counter}{path.suffix}"
+        counter += 1
+    try:
+        os.replace(path, target)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        # Different filesystem: copy next to the target, rename into place, then drop the original
+        partial = target.with_name(f".{target.name}.partial")
+        shutil.copy2(path, partial)
+        os.replace(partial, target)
+        path.unlink()
+    return target